@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Time importing readembedability.page in a fresh interpreter (which is
+what bin/readable and every new worker process pay), and then loading
+everything lazily imported with warmup().
+
+Usage: python benchmarks/bench_import.py
+"""
+import os
+import subprocess
+import sys
+
+RUNS = 5
+ROOT = os.path.abspath("%s/.." % os.path.dirname(__file__))
+SCRIPT = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.perf_counter()
+import readembedability.page
+imported = time.perf_counter()
+readembedability.page.warmup()
+print(imported - start, time.perf_counter() - imported)
+""" % ROOT
+
+
+def main():
+    imports = []
+    warmups = []
+    for _ in range(RUNS):
+        output = subprocess.check_output([sys.executable, "-c", SCRIPT])
+        imported, warmed = map(float, output.split())
+        imports.append(imported)
+        warmups.append(warmed)
+    print("best of %i: import %.4fs, warmup %.4fs" % (RUNS, min(imports),
+                                                      min(warmups)))
+
+
+if __name__ == '__main__':
+    main()
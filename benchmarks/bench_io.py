@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Time HTTPResponse.process on multi-megabyte bodies, against the old
+approach of reading 1k at a time into an immutable bytes object.
+
+Usage: python benchmarks/bench_io.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append("%s/.." % os.path.dirname(__file__))
+from readembedability.io import HTTPResponse
+from readembedability.tests.utils import FakeClientResponse
+
+SIZES = [1000000, 3000000, 5000000]
+RUNS = 5
+
+
+async def old_process(response):
+    body = bytes()
+    chunk = await response.content.read(1024)
+    while chunk and len(body) < 5000000:
+        body += chunk
+        chunk = await response.content.read(1024)
+    return body.decode('utf-8', 'ignore')
+
+
+async def new_process(response):
+    result = HTTPResponse(response, 5000000)
+    await result.process()
+    return result.body
+
+
+def best_time(loop, func, body):
+    best = None
+    for _ in range(RUNS):
+        response = FakeClientResponse(body)
+        start = time.perf_counter()
+        loop.run_until_complete(func(response))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, response.content.reads
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    print("%10s %12s %8s %12s %8s" % ("bytes", "old (s)", "reads",
+                                     "new (s)", "reads"))
+    for size in SIZES:
+        body = b"<p>" + (b"x" * (size - 7)) + b"</p>"
+        old, oldreads = best_time(loop, old_process, body)
+        new, newreads = best_time(loop, new_process, body)
+        print("%10i %12.4f %8i %12.4f %8i" % (size, old, oldreads,
+                                             new, newreads))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
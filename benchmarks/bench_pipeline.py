@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+Time every stage of extracting a generated corpus of pages (see
+corpus.py) with everything fetched from memory: fetching (through
+get_page and HTTPResponse), parsing the document, each parser in
+PARSERS, sanitize_html, the Summarizer, and the whole pipeline.
+
+Reports throughput, p50 and p99 for each stage and peak memory for
+each kind of page, and compares them against a saved baseline.  Exits
+with status 1 if any stage's p50 got more than --threshold percent
+slower than the baseline.
+
+Usage: python benchmarks/bench_pipeline.py [--runs N] [--save]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict, defaultdict
+
+sys.path.append("%s/.." % os.path.dirname(__file__))
+from readembedability import io, page as pages
+from readembedability.cache import MemoryCache
+from readembedability.io import HTTPResponse, get_page
+from readembedability.parsers import sanitize
+from readembedability.parsers.assets import ImagesParser
+from readembedability.parsers.base import ParseContext
+from readembedability.parsers.result import ParseResult
+from readembedability.parsers.sanitize import sanitize_html
+from readembedability.parsers.text import Summarizer
+from readembedability.tests.utils import FakeClientResponse
+
+import corpus
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class CorpusClient:
+    """
+    An HTTPClient that serves the corpus from memory (and 404s anything
+    else), so fetches cost what processing a response costs.
+    """
+    def __init__(self, responses):
+        self.responses = responses
+        self.missing = set()
+
+    async def fetch(self, url, headers, timeout, maxsize):
+        # pylint: disable=unused-argument
+        found = self.responses.get(url)
+        if found is None:
+            self.missing.add(url)
+            response = FakeClientResponse(b"", url=url, status=404)
+        else:
+            response = FakeClientResponse(found.body, found.content_type,
+                                          url=url)
+        result = HTTPResponse(response, maxsize)
+        await result.process()
+        return result
+
+    async def close(self):
+        pass
+
+
+class SeededSizes(MemoryCache):
+    """
+    An ImagesParser.SIZE_CACHE that already knows every image's size, so
+    images are never fetched.
+    """
+    def get(self, key, default=None):
+        self.hits += 1
+        return (800, 450)
+
+
+class Timings:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def time(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.samples[stage].append(time.perf_counter() - start)
+        return result
+
+    async def time_async(self, stage, coro):
+        start = time.perf_counter()
+        result = await coro
+        self.samples[stage].append(time.perf_counter() - start)
+        return result
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = int(round(pct / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def extract_stages(page, timings):
+    """
+    Run the pipeline one stage at a time (in PARSERS order, which gives
+    the same result as the ParserScheduler), timing each.
+    """
+    response = await timings.time_async('fetch', get_page(page.url))
+    context = timings.time('parse', ParseContext, response)
+    result = ParseResult(page.url)
+    result.set('canonical_url', response.url)
+    result.set('success', True)
+    for pclass in pages.PARSERS:
+        if not result.get('success'):
+            break
+        name = pclass.__name__
+        parser = pclass(response, context)
+        await timings.time_async(name, parser.enrich(result.for_parser(name)))
+
+    if context.soup is not None:
+        timings.time('sanitize_html', sanitize_html, response.body)
+        text = result.get('_text') or context.soup.all_text()
+
+        def summarize():
+            sumzer = Summarizer(text, result.get('title') or "")
+            return sumzer.summary(), sumzer.keywords()
+        timings.time('Summarizer', summarize)
+
+
+async def extract(page):
+    return await pages.get_readembedable_result(page.url)
+
+
+def run(loop, corpus_pages, runs):
+    timings = Timings()
+    for _ in range(runs):
+        for page in corpus_pages:
+            loop.run_until_complete(extract_stages(page, timings))
+            loop.run_until_complete(
+                timings.time_async('pipeline', extract(page)))
+    return timings
+
+
+def peak_memory(loop, corpus_pages):
+    """
+    The most memory (in KB) that extracting any one page of each kind
+    took.
+    """
+    peaks = OrderedDict()
+    for page in corpus_pages:
+        tracemalloc.start()
+        loop.run_until_complete(extract(page))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks[page.kind] = max(peaks.get(page.kind, 0), peak // 1024)
+    return peaks
+
+
+def summarize_timings(timings):
+    stats = OrderedDict()
+    for stage, samples in timings.samples.items():
+        stats[stage] = {
+            'count': len(samples),
+            'per_second': len(samples) / sum(samples),
+            'p50': percentile(samples, 50) * 1000,
+            'p99': percentile(samples, 99) * 1000
+        }
+    return stats
+
+
+def change(current, baseline):
+    if not baseline:
+        return None
+    return (current - baseline) * 100.0 / baseline
+
+
+def report(stats, peaks, baseline, threshold):
+    """
+    Print stats and peaks (next to the baseline's), and return the
+    stages that regressed.
+    """
+    regressed = []
+    oldstats = baseline.get('stages', {})
+    print("%-22s %7s %10s %10s %10s %9s" % ("stage", "count", "per sec",
+                                            "p50 (ms)", "p99 (ms)",
+                                            "p50 diff"))
+    for stage, stat in stats.items():
+        old = oldstats.get(stage, {}).get('p50')
+        diff = change(stat['p50'], old)
+        mark = ""
+        if diff is not None and diff > threshold:
+            regressed.append(stage)
+            mark = " !"
+        diff = "" if diff is None else "%+.1f%%" % diff
+        print("%-22s %7i %10.1f %10.3f %10.3f %9s%s" % (
+            stage, stat['count'], stat['per_second'], stat['p50'],
+            stat['p99'], diff, mark))
+
+    oldpeaks = baseline.get('peak_kb', {})
+    print("\n%-22s %10s %9s" % ("page kind", "peak (KB)", "diff"))
+    for kind, peak in peaks.items():
+        diff = change(peak, oldpeaks.get(kind))
+        diff = "" if diff is None else "%+.1f%%" % diff
+        print("%-22s %10i %9s" % (kind, peak, diff))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3,
+                        help="times to extract each page")
+    parser.add_argument("--per-kind", type=int, default=3,
+                        help="pages of each kind in the corpus")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="save these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="percent slower that counts as a regression")
+    options = parser.parse_args()
+
+    corpus_pages, responses = corpus.build(options.per_kind)
+    client = CorpusClient(responses)
+    io.CLIENT = client
+    ImagesParser.SIZE_CACHE = SeededSizes()
+    # every run should do all of the work
+    pages.RESULT_CACHE = None
+    sanitize.SANITIZE_CACHE = None
+
+    pages.warmup()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # one untimed pass, so nothing's measuring first use
+    run(loop, corpus_pages, 1)
+    stats = summarize_timings(run(loop, corpus_pages, options.runs))
+    peaks = peak_memory(loop, corpus_pages)
+    loop.close()
+
+    if client.missing:
+        print("warning: fetched urls not in the corpus: %s" %
+              ", ".join(sorted(client.missing)))
+
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as fhandle:
+            baseline = json.load(fhandle)
+    regressed = report(stats, peaks, baseline, options.threshold)
+
+    if options.save:
+        with open(options.baseline, 'w') as fhandle:
+            json.dump({'stages': stats, 'peak_kb': peaks}, fhandle,
+                      indent=2)
+        print("\nsaved baseline to %s" % options.baseline)
+    elif regressed:
+        print("\nslower than the baseline: %s" % ", ".join(regressed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Time summarizing a (generated) 10,000 word article: building the
+Summarizer, then getting its summary, keywords and slug.
+
+Usage: python benchmarks/bench_summarizer.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append("%s/.." % os.path.dirname(__file__))
+from readembedability.parsers.text import Summarizer
+
+WORDS = 10000
+RUNS = 5
+VOCABULARY = """
+the council voted on a new budget for the city schools and the river
+bridge after months of debate over housing energy water and taxes while
+residents packed the hall to hear reports from police courts and local
+businesses about the plan which supporters say will pay for itself
+""".split()
+NAMES = ["Mayor Jane Smith", "New York", "Chief Justice Roberts",
+         "City Council", "Department of Energy"]
+TITLE = "City Council passes budget for schools and the river bridge"
+
+
+def article(seed=0):
+    """
+    Sentences of random words, with names sprinkled in and the odd
+    paragraph break.
+    """
+    rand = random.Random(seed)
+    sentences = []
+    count = 0
+    while count < WORDS:
+        words = [rand.choice(VOCABULARY) for _ in range(rand.randint(8, 25))]
+        if rand.random() < 0.4:
+            words.insert(rand.randint(0, len(words)), rand.choice(NAMES))
+        sentence = " ".join(words)
+        sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        if rand.random() < 0.2:
+            sentences.append("\n\n")
+        count += len(words)
+    return " ".join(sentences)
+
+
+def summarize(text):
+    sumzer = Summarizer(text, TITLE)
+    return sumzer.summary(), sumzer.keywords(), sumzer.slug()
+
+
+def main():
+    text = article()
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        summarize(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print("%i words, best of %i: %.4fs" % (len(text.split()), RUNS, best))
+
+
+if __name__ == '__main__':
+    main()
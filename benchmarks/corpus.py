@@ -0,0 +1,212 @@
+"""
+A generated corpus of pages shaped like the ones readembedability sees in
+the wild, for benchmarks.  Everything is built from a seeded random, so
+the corpus is the same every run (and baselines stay comparable).
+
+build() gives the pages to extract, along with a response for every
+other url they lead to (AMP versions and oEmbed endpoints), so nothing
+ever needs the network.  Images are never fetched: benchmarks seed the
+image size cache instead.
+"""
+import json
+import random
+from collections import OrderedDict
+from urllib.parse import quote
+
+HOST = "http://bench.example.com"
+VOCABULARY = """
+the council voted on a new budget for the city schools and the river
+bridge after months of debate over housing energy water and taxes while
+residents packed the hall to hear reports from police courts and local
+businesses about the plan which supporters say will pay for itself
+""".split()
+NAMES = ["Mayor Jane Smith", "New York", "Chief Justice Roberts",
+         "City Council", "Department of Energy"]
+# fake bytes for images and pdfs - no parser looks inside them
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048
+PDF = b"%PDF-1.4\n" + b"0" * 4096
+
+
+class Page:
+    """
+    A url, what fetching it gives (body is bytes), and its kind.
+    """
+    # pylint: disable=too-few-public-methods
+    def __init__(self, kind, url, body, content_type="text/html"):
+        self.kind = kind
+        self.url = url
+        self.body = body
+        self.content_type = content_type
+
+
+def sentence(rand, names=True):
+    words = [rand.choice(VOCABULARY) for _ in range(rand.randint(8, 25))]
+    if names and rand.random() < 0.4:
+        words.insert(rand.randint(0, len(words)), rand.choice(NAMES))
+    text = " ".join(words)
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraphs(rand, count):
+    return ["<p>%s</p>" % " ".join(sentence(rand) for _ in range(5))
+            for _ in range(count)]
+
+
+def chrome(rand, links=40):
+    """
+    The nav, share buttons, ads and footer that surround articles.
+    """
+    nav = "".join("<li><a href='/section/%i'>Section %i</a></li>" % (i, i)
+                  for i in range(links))
+    share = ("<div class='share'><a href='https://twitter.com/share?u=x'>"
+             "Tweet</a><a href='https://facebook.com/sharer/sharer.php'>"
+             "Share</a></div>")
+    ads = "".join("<div class='ad'><script>ad(%i)</script>"
+                  "<p>Advertisement</p></div>" % i for i in range(5))
+    footer = ("<footer><div class='newsletter signup'>Sign up for our "
+              "newsletter!</div><p>%s</p></footer>" % sentence(rand, False))
+    return ("<header><nav><ul>%s</ul></nav></header>" % nav, share + ads,
+            footer)
+
+
+def head(title, extra=""):
+    metas = [
+        "<meta charset='utf-8'>",
+        "<meta property='og:title' content='%s'>" % title,
+        "<meta property='og:description' content='%s'>" % title.lower(),
+        "<meta property='og:image' content='%s/img/og.png'>" % HOST,
+        "<meta name='twitter:image' content='%s/img/tw.png'>" % HOST,
+        "<meta name='author' content='Jane Smith'>",
+        "<meta property='article:published_time' "
+        "content='2017-03-13T10:00:00Z'>",
+        "<meta property='article:tag' content='budget'>",
+        "<link rel='stylesheet' href='/style.css'>",
+        "<script src='/app.js'></script>",
+    ]
+    return "<head><title>%s</title>%s%s</head>" % (title, "".join(metas),
+                                                   extra)
+
+
+def news(rand, index):
+    url = "%s/2017/03/13/news-%i.html" % (HOST, index)
+    title = "City Council passes budget %i" % index
+    nav, ads, footer = chrome(rand)
+    imgs = "".join("<figure><img src='/img/%i.png' width='800' "
+                   "height='450'><figcaption class='caption'>%s"
+                   "</figcaption></figure>" % (i, sentence(rand))
+                   for i in range(4))
+    body = ("<article itemscope itemtype='http://schema.org/Article'>"
+            "<h1>%s</h1><p class='byline'>By Jane Smith</p>%s%s</article>"
+            % (title, imgs, "".join(paragraphs(rand, 30))))
+    html = "<html>%s<body>%s<main>%s%s</main>%s</body></html>" % (
+        head(title), nav, ads, body, footer)
+    return [Page('news', url, html.encode('utf-8'))]
+
+
+def blog(rand, index):
+    url = "%s/blog/post-%i/" % (HOST, index)
+    title = "Thoughts on the river bridge, part %i" % index
+    nav, ads, footer = chrome(rand, 15)
+    comments = "".join("<li class='comment'><cite>reader%i</cite><p>%s</p>"
+                       "</li>" % (i, sentence(rand, False))
+                       for i in range(60))
+    endpoint = "%s/oembed?url=%s" % (HOST, quote(url, safe=''))
+    oembed = ("<link rel='alternate' type='application/json+oembed' "
+              "href='%s'>" % endpoint)
+    body = ("<div class='entry-content'>%s</div><ol class='comments'>%s"
+            "</ol>" % ("".join(paragraphs(rand, 12)), comments))
+    html = "<html>%s<body>%s%s<div id='sidebar'>%s</div>%s</body></html>"
+    html = html % (head(title, oembed), nav, body, ads, footer)
+    embed = json.dumps({'type': 'rich', 'title': title,
+                        'author_name': 'Jane Smith',
+                        'html': 'Embedded WordPress Post'})
+    return [Page('blog', url, html.encode('utf-8')),
+            Page('blog', endpoint, embed.encode('utf-8'),
+                 "application/json")]
+
+
+def amp(rand, index):
+    url = "%s/2017/03/14/amp-%i.html" % (HOST, index)
+    ampurl = url.replace(".html", ".amp.html")
+    title = "Bridge plan advances %i" % index
+    nav, ads, footer = chrome(rand)
+    link = "<link rel='amphtml' href='%s'>" % ampurl
+    html = "<html>%s<body>%s%s<article>%s</article>%s</body></html>" % (
+        head(title, link), nav, ads, "".join(paragraphs(rand, 20)), footer)
+    imgs = "".join("<amp-img src='/img/amp%i.png' width='800' height='450'>"
+                   "</amp-img>" % i for i in range(3))
+    amphtml = ("<html amp>%s<body><article>%s%s</article></body></html>"
+               % (head(title), imgs, "".join(paragraphs(rand, 20))))
+    return [Page('amp', url, html.encode('utf-8')),
+            Page('amp', ampurl, amphtml.encode('utf-8'))]
+
+
+def image(_rand, index):
+    url = "%s/img/photo-%i.png" % (HOST, index)
+    return [Page('image', url, PNG, "image/png")]
+
+
+def pdf(_rand, index):
+    url = "%s/docs/report-%i.pdf" % (HOST, index)
+    return [Page('pdf', url, PDF, "application/pdf")]
+
+
+def ldjson(rand, index):
+    url = "%s/2017/03/15/ldjson-%i.html" % (HOST, index)
+    title = "Schools get new funding %i" % index
+    scripts = []
+    for i in range(40):
+        obj = OrderedDict([
+            ('@context', 'http://schema.org'),
+            ('@type', 'NewsArticle' if i == 0 else 'BreadcrumbList'),
+            ('headline', title), ('creator', [['Jane Smith']]),
+            ('dateCreated', '2017-03-15T09:00:00Z'),
+            ('itemListElement', [{'position': j, 'name': sentence(rand)}
+                                 for j in range(10)])])
+        scripts.append("<script type='application/ld+json'>%s</script>"
+                       % json.dumps(obj))
+    nav, ads, footer = chrome(rand)
+    html = "<html>%s<body>%s%s<article>%s</article>%s</body></html>" % (
+        head(title, "".join(scripts)), nav, ads,
+        "".join(paragraphs(rand, 15)), footer)
+    return [Page('ldjson', url, html.encode('utf-8'))]
+
+
+def huge(rand, index):
+    """
+    A page with a huge, deeply nested DOM (like an infinite scroll page
+    or a forum thread).
+    """
+    url = "%s/forum/thread-%i" % (HOST, index)
+    title = "Megathread: the city budget %i" % index
+    posts = []
+    for i in range(300):
+        depth = rand.randint(1, 12)
+        text = "<span>%s</span>" % sentence(rand, False)
+        posts.append("<div class='post' id='p%i'>%s%s%s</div>" % (
+            i, "<div><div>" * depth, text, "</div></div>" * depth))
+    html = "<html>%s<body>%s</body></html>" % (head(title), "".join(posts))
+    return [Page('huge', url, html.encode('utf-8'))]
+
+
+KINDS = OrderedDict([('news', news), ('blog', blog), ('amp', amp),
+                     ('image', image), ('pdf', pdf), ('ldjson', ldjson),
+                     ('huge', huge)])
+
+
+def build(per_kind=3, seed=0):
+    """
+    Return (pages, responses): the pages to extract, and a dict of url to
+    Page for every url that can be fetched.
+    """
+    rand = random.Random(seed)
+    pages = []
+    responses = {}
+    for kind, make in KINDS.items():
+        for index in range(per_kind):
+            made = make(rand, index)
+            pages.append(made[0])
+            for page in made:
+                responses[page.url] = page
+    return pages, responses
+
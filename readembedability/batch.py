@@ -0,0 +1,105 @@
+import asyncio
+from collections import Counter, deque
+
+# returned by Batch._next_item when there are no more items
+_DONE = object()
+
+
+class Batch:
+    """
+    An async iterator over (item, await func(item)) for every item in
+    items (an iterable or an async iterator), in the order the calls
+    finish.
+
+    At most limit calls run at once, and at most limit_per_key of them
+    for items with the same key(item) (say, the same host).  Items are
+    only taken from items when there's room for them, and finished calls
+    wait for the consumer, so no more than 2 * limit items are ever held
+    no matter how long items is.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, func, items, limit=20, key=None, limit_per_key=None):
+        self.func = func
+        self.limit = limit
+        self.key = key or (lambda item: None)
+        self.limit_per_key = limit_per_key or limit
+        if hasattr(items, '__aiter__'):
+            self._items = items.__aiter__()
+            self._async = True
+        else:
+            self._items = iter(items)
+            self._async = False
+        self._exhausted = False
+        # running tasks, and the (item, key) each is for
+        self._running = {}
+        self._active = Counter()
+        # items whose key was at its limit when they came up
+        self._deferred = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._fill()
+        if not self._running:
+            raise StopAsyncIteration
+        done, _ = await asyncio.wait(list(self._running),
+                                     return_when=asyncio.FIRST_COMPLETED)
+        task = done.pop()
+        item, key = self._running.pop(task)
+        self._active[key] -= 1
+        if not self._active[key]:
+            del self._active[key]
+        return (item, task.result())
+
+    async def close(self):
+        """
+        Cancel any calls still running, and take no more items.
+        """
+        self._exhausted = True
+        self._deferred.clear()
+        for task in self._running:
+            task.cancel()
+        if self._running:
+            await asyncio.wait(list(self._running))
+        self._running.clear()
+        self._active.clear()
+
+    def _has_room(self, key):
+        return self._active[key] < self.limit_per_key
+
+    def _start(self, item, key):
+        task = asyncio.ensure_future(self.func(item))
+        self._running[task] = (item, key)
+        self._active[key] += 1
+
+    async def _next_item(self):
+        if self._async:
+            try:
+                return await self._items.__anext__()
+            except StopAsyncIteration:
+                return _DONE
+        return next(self._items, _DONE)
+
+    async def _fill(self):
+        for _ in range(len(self._deferred)):
+            if len(self._running) >= self.limit:
+                return
+            item, key = self._deferred.popleft()
+            if self._has_room(key):
+                self._start(item, key)
+            else:
+                self._deferred.append((item, key))
+
+        while len(self._running) < self.limit and not self._exhausted:
+            if len(self._deferred) >= self.limit:
+                return
+            item = await self._next_item()
+            if item is _DONE:
+                self._exhausted = True
+                return
+            key = self.key(item)
+            if self._has_room(key):
+                self._start(item, key)
+            else:
+                self._deferred.append((item, key))
@@ -0,0 +1,257 @@
+import copy
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict, defaultdict
+
+from readembedability.timing import Timings
+
+# Pass as the default to get to tell a miss apart from a cached None
+MISSING = object()
+
+
+class MemoryCache:
+    """
+    An in memory LRU cache.  Entries expire after ttl seconds (if ttl is
+    given), and the least recently used entries are dropped when there
+    are more than maxsize of them.
+    """
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        if entry[1] is not None and entry[1] < time.time():
+            del self._entries[key]
+            return MISSING
+        return entry[0]
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache value for key.  If ttl isn't given, the cache's is used.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.time() + ttl
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, key):
+        return self._lookup(key) is not MISSING
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    A cache that persists (pickled) values to a local sqlite database,
+    so it can survive restarts and be shared between processes.  Just
+    like MemoryCache, entries expire after ttl seconds (if ttl is given)
+    and the least recently used are dropped when there are more than
+    maxsize of them (expired entries go first).
+
+    So that hits don't each need a write, when entries are used is kept
+    in memory and only written out on set, on close, and whenever
+    FLUSH_USES different entries have been used.  Each process only
+    counts the entries it adds, so a database shared between processes
+    can grow past maxsize until they add enough to notice.
+    """
+    FLUSH_USES = 256
+
+    def __init__(self, path, maxsize=10000, ttl=None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path)
+        # used orders entries from least to most recently used
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache "
+                         "(key TEXT PRIMARY KEY, value BLOB, expires REAL, "
+                         "used INTEGER DEFAULT 0)")
+        info = self._db.execute("PRAGMA table_info(cache)")
+        columns = [row[1] for row in info]
+        if 'used' not in columns:
+            # made before there was a maxsize
+            self._db.execute("ALTER TABLE cache ADD COLUMN used INTEGER "
+                             "DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_used "
+                         "ON cache (used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_expires "
+                         "ON cache (expires)")
+        self._db.commit()
+        query = "SELECT COALESCE(MAX(used), 0), COUNT(*) FROM cache"
+        self._clock, self._count = self._db.execute(query).fetchone()
+        # key => used, for hits that haven't been written out yet
+        self._uses = {}
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def _lookup(self, key):
+        query = "SELECT value, expires FROM cache WHERE key = ?"
+        row = self._db.execute(query, (key,)).fetchone()
+        if row is None:
+            return MISSING
+        if row[1] is not None and row[1] < time.time():
+            self.delete(key)
+            return MISSING
+        return pickle.loads(row[0])
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._uses[key] = self._tick()
+        if len(self._uses) >= DiskCache.FLUSH_USES:
+            self._flush()
+            self._db.commit()
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache value for key.  If ttl isn't given, the cache's is used.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.time() + ttl
+        value = sqlite3.Binary(pickle.dumps(value))
+        query = "SELECT 1 FROM cache WHERE key = ?"
+        if self._db.execute(query, (key,)).fetchone() is None:
+            self._count += 1
+        self._uses.pop(key, None)
+        query = "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)"
+        self._db.execute(query, (key, value, expires, self._tick()))
+        self._flush()
+        if self._count > self.maxsize:
+            self._trim()
+        self._db.commit()
+
+    def _flush(self):
+        if self._uses:
+            query = "UPDATE cache SET used = ? WHERE key = ?"
+            uses = [(used, key) for key, used in self._uses.items()]
+            self._db.executemany(query, uses)
+            self._uses = {}
+
+    def _trim(self):
+        """
+        Purge expired entries, and then drop the least recently used
+        until there are only maxsize left.
+        """
+        self._count -= self._purge()
+        extra = self._count - self.maxsize
+        if extra > 0:
+            query = ("DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                     "ORDER BY used LIMIT ?)")
+            self._count -= self._db.execute(query, (extra,)).rowcount
+
+    def _purge(self):
+        query = "DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?"
+        return self._db.execute(query, (time.time(),)).rowcount
+
+    def purge(self):
+        """
+        Delete every expired entry.
+        """
+        self._count -= self._purge()
+        self._db.commit()
+
+    def delete(self, key):
+        self._uses.pop(key, None)
+        query = "DELETE FROM cache WHERE key = ?"
+        self._count -= self._db.execute(query, (key,)).rowcount
+        self._db.commit()
+
+    def clear(self):
+        self._uses = {}
+        self._count = 0
+        self._db.execute("DELETE FROM cache")
+        self._db.commit()
+
+    def close(self):
+        self._flush()
+        self._db.commit()
+        self._db.close()
+
+    def __contains__(self, key):
+        return self._lookup(key) is not MISSING
+
+    def __len__(self):
+        query = "SELECT COUNT(*) FROM cache"
+        return self._db.execute(query).fetchone()[0]
+
+
+class ResultCache:
+    """
+    Caches ParseResults by URL, along with the validators (ETag and
+    Last-Modified headers) of the response they were parsed from, so a
+    later fetch of the same URL can be a conditional request.  Results
+    from responses without validators aren't cached, since there'd be no
+    way to tell if they're stale.
+    """
+    def __init__(self, store=None):
+        self.store = MemoryCache(maxsize=1000) if store is None else store
+        self.revalidated = 0
+
+    def lookup(self, url):
+        return self.store.get(url.normalized)
+
+    # pylint: disable=no-self-use
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def save(self, url, response, result):
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if not result.get('success') or not (etag or last_modified):
+            # whatever was cached is out of date now
+            self.store.delete(url.normalized)
+            return
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'result': ResultCache.stripped(result)
+        }
+        self.store.set(url.normalized, entry)
+
+    @classmethod
+    def stripped(cls, result):
+        """
+        A copy of result to cache, without the log and timings of the run
+        that made it (which are most of its size, and no use later).
+        """
+        result = copy.copy(result)
+        result.log = defaultdict(list)
+        result.timings = Timings(result.timings.url)
+        return copy.deepcopy(result)
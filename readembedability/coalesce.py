@@ -0,0 +1,38 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key: while a call for a key is
+    in flight, any other calls for that key wait for (and share) its
+    result instead of doing the work again.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+
+    @property
+    def in_flight(self):
+        return len(self._flights)
+
+    async def run(self, key, func, *args, **kwargs):
+        """
+        Return the result of await func(*args, **kwargs), unless there's
+        already a call in flight for key, in which case return its result.
+        """
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(func(*args, **kwargs))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _: self._land(key, flight))
+        else:
+            self.coalesced += 1
+        # one waiter going away (say, a client hanging up) shouldn't
+        # cancel the call for everyone else
+        return await asyncio.shield(flight)
+
+    def _land(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -2,6 +2,7 @@ import cgi
 import json
 import logging
 import asyncio
+from collections import Counter
 
 import aiohttp
 
@@ -27,6 +28,12 @@ IMAGE_CONTENT_TYPES = [
 ]
 
 
+# Bodies are read in chunks that start small (most pages are small) and
+# double in size up to the max, so large bodies only take a few reads.
+MIN_CHUNK_SIZE = 16384
+MAX_CHUNK_SIZE = 1048576
+
+
 class ResponseTooLargeError(Exception):
     """Response from HTTP request was too large."""
     pass
@@ -53,25 +60,42 @@ class HTTPResponse:
             self.content_type, _ = cgi.parse_header(content_types)
 
     async def process(self):
-        body = bytes()
-        chunk = await self.response.content.read(1024)
-        while chunk and len(body) < self.maxsize:
+        # no need to download anything we already know is too big
+        length = self.headers.get('content-length', '')
+        if length.isdigit() and int(length) > self.maxsize:
+            raise ResponseTooLargeError
+
+        # a bytearray grows in place, unlike bytes
+        body = bytearray()
+        chunksize = MIN_CHUNK_SIZE
+        while len(body) <= self.maxsize:
+            # never read more than a byte past maxsize
+            size = min(chunksize, self.maxsize + 1 - len(body))
+            chunk = await self.response.content.read(size)
+            if not chunk:
+                break
             body += chunk
-            chunk = await self.response.content.read(1024)
+            chunksize = min(chunksize * 2, MAX_CHUNK_SIZE)
 
-        if not self.response.content.at_eof():
+        if len(body) > self.maxsize:
             raise ResponseTooLargeError
 
         # pylint: disable=protected-access
-        self.response._content = body
-
         if self.is_binary():
-            self.body = body
+            self.body = bytes(body)
+            self.response._content = self.body
         else:
             # Until https://github.com/KeepSafe/aiohttp/pull/1542 is accepted
             # and released...
+            self.response._content = body
             encoding = self.response._get_encoding()
-            self.body = self.response._content.decode(encoding, 'ignore')
+            self.body = body.decode(encoding, 'ignore')
+
+    def __getstate__(self):
+        # the aiohttp response can't (and needn't) be pickled
+        state = self.__dict__.copy()
+        state['response'] = None
+        return state
 
     def is_binary(self):
         """
@@ -119,11 +143,65 @@ class HTTPResponse:
         return (not self.body) or self.body.strip() == ""
 
 
+class HTTPClient:
+    """
+    A long lived HTTP client.  Connections are pooled (and kept alive)
+    so that every page, AMP page and oEmbed lookup for a host doesn't
+    need a new TCP / TLS handshake.  The underlying session is created
+    on first use; call close() on shutdown.
+    """
+    def __init__(self, limit=100, limit_per_host=8, keepalive_timeout=30):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._loop = None
+
+    @property
+    def session(self):
+        loop = asyncio.get_event_loop()
+        stale = self._session is None or self._session.closed
+        # sessions can't be shared across event loops
+        if stale or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                verify_ssl=False,
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                loop=loop)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  loop=loop)
+            self._loop = loop
+        return self._session
+
+    async def fetch(self, url, headers, timeout, maxsize):
+        kwargs = {'headers': headers, 'timeout': timeout}
+        async with self.session.get(url, **kwargs) as resp:
+            result = HTTPResponse(resp, maxsize)
+            await result.process()
+        return result
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+# The client shared by everything that doesn't pass its own to get_page
+CLIENT = HTTPClient()
+
+# How every get_page turned out: 'ok', or the kind of error
+FETCH_OUTCOMES = Counter()
+
+
 async def get_page(url, headers=None, timeout=10, mobile=False,
-                   maxsize=5000000):
+                   maxsize=5000000, client=None):
     """
-    Param maxsize has a 5mb cutoff by default.
+    Param maxsize has a 5mb cutoff by default.  If client isn't given,
+    the shared module level CLIENT is used.
     """
+    client = client or CLIENT
     headers = headers or {}
     if 'User-Agent' not in headers:
         usera = "readembedability/%s" % __version__
@@ -136,26 +214,24 @@ async def get_page(url, headers=None, timeout=10, mobile=False,
     surl = str(url)
 
     LOG.info("Attempting to download %s", url)
+    outcome = 'ok'
     try:
-        kwargs = {
-            'connector': aiohttp.TCPConnector(verify_ssl=False),
-            'headers': headers
-        }
-        async with aiohttp.ClientSession(**kwargs) as session:
-            async with session.get(surl, timeout=timeout) as resp:
-                result = HTTPResponse(resp, maxsize)
-                await result.process()
+        result = await client.fetch(surl, headers, timeout, maxsize)
     except ResponseTooLargeError:
         msg = "Server responded with more than %i allowed bytes for %s"
         LOG.error(msg, maxsize, url)
-        result = None
+        outcome, result = 'too_large', None
     except aiohttp.ClientError as error:
         LOG.error("Connection error while fetching %s: %s", url, error)
-        result = None
+        outcome, result = 'client_error', None
     except asyncio.CancelledError as error:
         LOG.error("Client error fetching %s: %s", url, error)
-        result = None
+        outcome, result = 'cancelled', None
     except asyncio.TimeoutError:
         LOG.error("Timeout reached for %s", url)
-        result = None
+        outcome, result = 'timeout', None
+    except Exception:
+        FETCH_OUTCOMES['error'] += 1
+        raise
+    FETCH_OUTCOMES[outcome] += 1
     return result
@@ -0,0 +1,35 @@
+import importlib
+
+# every LazyModule, so they can all be loaded up front (see load_all)
+MODULES = []
+
+
+class LazyModule:
+    """
+    A stand in for a module that isn't imported until one of its
+    attributes is first used.  Heavy libraries that only some parsers use
+    are imported like this, so that importing readembedability is quick.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        MODULES.append(self)
+
+    # nothing public here, so nothing can hide the module's attributes
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "not loaded" if self._module is None else "loaded"
+        return "<LazyModule %s (%s)>" % (self._name, state)
+
+
+def load_all():
+    for module in MODULES:
+        # pylint: disable=protected-access
+        module._load()
@@ -0,0 +1,280 @@
+import asyncio
+import math
+from collections import OrderedDict
+
+from readembedability import io, page, timing
+from readembedability.parsers import sanitize
+from readembedability.parsers.assets import ImagesParser
+from readembedability.utils import URL
+
+# Just enough of the Prometheus client (counters, gauges and histograms,
+# rendered in the text exposition format) to serve a /metrics endpoint
+# without any dependencies.
+
+# seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+# Page fetches slower than this (in seconds) are counted by host
+SLOW_FETCH = 2.0
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value):
+    value = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    labels = ",".join('%s="%s"' % (n, escape_label(v)) for n, v in pairs)
+    return "{%s}" % labels
+
+
+class Metric:
+    """
+    A metric with values for each combination of its labels.  Once there
+    are max_series combinations, any new ones are counted under
+    "other" for every label (so a label like host can't grow forever).
+    """
+    TYPE = None
+
+    def __init__(self, name, doc, labels=(), max_series=None):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self.max_series = max_series
+        self.series = OrderedDict()
+
+    def _key(self, labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        full = self.max_series is not None and \
+            len(self.series) >= self.max_series
+        if key not in self.series and full:
+            key = tuple("other" for _ in self.labels)
+        return key
+
+    def set(self, value, **labels):
+        self.series[self._key(labels)] = value
+
+    def get(self, **labels):
+        return self.series.get(self._key(labels), 0)
+
+    def samples(self):
+        """
+        The (suffix, label values, extra labels, value) of each sample.
+        """
+        for key, value in self.series.items():
+            yield ("", key, None, value)
+
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.doc),
+                 "# TYPE %s %s" % (self.name, self.TYPE)]
+        for suffix, key, extra, value in self.samples():
+            labels = format_labels(self.labels, key, extra)
+            lines.append("%s%s%s %s" % (self.name, suffix, labels,
+                                        format_value(value)))
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.series[key] = self.series.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS,
+                 max_series=None):
+        super().__init__(name, doc, labels, max_series)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            # a count for each bucket, the sum and the count
+            series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                extra = [('le', format_value(bound))]
+                yield ("_bucket", key, extra, cumulative)
+            yield ("_sum", key, None, total)
+            yield ("_count", key, None, count)
+
+
+class Registry:
+    """
+    Metrics, rendered together.  Collectors are called before rendering,
+    to copy in values that are kept somewhere else (like cache hits).
+    """
+    def __init__(self):
+        self.metrics = OrderedDict()
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, doc, labels=(), max_series=None):
+        return self.add(Counter(name, doc, labels, max_series))
+
+    def gauge(self, name, doc, labels=(), max_series=None):
+        return self.add(Gauge(name, doc, labels, max_series))
+
+    # pylint: disable=too-many-arguments
+    def histogram(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS,
+                  max_series=None):
+        return self.add(Histogram(name, doc, labels, buckets, max_series))
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        for collector in self.collectors:
+            collector()
+        return "\n".join(m.render() for m in self.metrics.values()) + "\n"
+
+
+class ExtractionMetrics:
+    """
+    Metrics for every extraction in this process: how long parsers,
+    fetches and sanitizing took (from a timing hook), how fetches turned
+    out, and how often the caches hit.  With a ParserPool, the caches
+    that parsers use live in the workers, so their hits aren't seen here.
+    """
+    def __init__(self, registry):
+        self.registry = registry
+        self.parser_seconds = registry.histogram(
+            "readembedability_parser_seconds",
+            "Time each parser's enrich took", ['parser'])
+        self.fetch_seconds = registry.histogram(
+            "readembedability_fetch_seconds",
+            "Time fetches took (the page, and sub-fetches by parsers)",
+            ['kind'])
+        self.work_seconds = registry.histogram(
+            "readembedability_work_seconds",
+            "Time parsing documents and sanitizing html took", ['kind'])
+        self.slow_fetches = registry.counter(
+            "readembedability_slow_fetches_total",
+            "Page fetches slower than %s seconds, by host" % SLOW_FETCH,
+            ['host'], max_series=500)
+        self.fetch_outcomes = registry.counter(
+            "readembedability_fetch_outcomes_total",
+            "Fetches by outcome (ok or the kind of error)", ['outcome'])
+        self.cache_hits = registry.counter(
+            "readembedability_cache_hits_total", "Cache hits", ['cache'])
+        self.cache_misses = registry.counter(
+            "readembedability_cache_misses_total", "Cache misses",
+            ['cache'])
+        self.revalidated = registry.counter(
+            "readembedability_revalidated_total",
+            "Results served from the result cache after a 304")
+        self.extractions = registry.counter(
+            "readembedability_extractions_total", "Finished extractions")
+        self.in_flight = registry.gauge(
+            "readembedability_extractions_in_flight",
+            "Extractions that have started but not finished")
+        registry.add_collector(self.collect)
+        timing.add_hook(self.observe)
+
+    def observe(self, url, kind, name, wall, _cpu):
+        if kind == 'parser':
+            self.parser_seconds.observe(wall, parser=name)
+        elif kind == 'fetch':
+            self.fetch_seconds.observe(wall, kind=name)
+            if name == 'page' and wall > SLOW_FETCH and url:
+                self.slow_fetches.inc(host=URL(url).host.lower())
+        else:
+            self.work_seconds.observe(wall, kind=kind)
+
+    def collect(self):
+        finished = page.EXTRACTIONS['finished']
+        self.extractions.set(finished)
+        self.in_flight.set(page.EXTRACTIONS['started'] - finished)
+        for outcome, count in io.FETCH_OUTCOMES.items():
+            self.fetch_outcomes.set(count, outcome=outcome)
+
+        caches = [('sanitize', sanitize.SANITIZE_CACHE),
+                  ('image_size', ImagesParser.SIZE_CACHE)]
+        if page.RESULT_CACHE is not None:
+            caches.append(('result', page.RESULT_CACHE.store))
+            self.revalidated.set(page.RESULT_CACHE.revalidated)
+        for name, cache in caches:
+            if cache is not None:
+                self.cache_hits.set(cache.hits, cache=name)
+                self.cache_misses.set(cache.misses, cache=name)
+
+    def close(self):
+        timing.remove_hook(self.observe)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a sleep of interval
+    seconds, which is how long callbacks wait behind blocking work.
+    """
+    def __init__(self, registry, interval=0.5):
+        self.interval = interval
+        self.lag = registry.gauge(
+            "readembedability_event_loop_last_lag_seconds",
+            "How late the event loop last woke up from a sleep")
+        self.lags = registry.histogram(
+            "readembedability_event_loop_lag_seconds",
+            "How late the event loop wakes up from sleeps",
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                     2.5))
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.lag.set(lag)
+            self.lags.observe(lag)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,8 +1,15 @@
+import copy
 import logging
+from collections import Counter
 
+from readembedability import lazy
+from readembedability.batch import Batch
 from readembedability.io import get_page
+from readembedability.cache import ResultCache
 from readembedability.utils import URL
 from readembedability.parsers.result import ParseResult
+from readembedability.parsers.base import ParseContext
+from readembedability.parsers.schedule import ParserScheduler
 from readembedability.parsers import assets
 from readembedability.parsers import oembed
 from readembedability.parsers import content
@@ -12,6 +19,14 @@ from readembedability.parsers import text
 
 LOG = logging.getLogger(__name__)
 
+# Results are cached by URL with the ETag / Last-Modified of the page they
+# came from, and served again when a conditional request for the page
+# gets a 304.  Set to None to turn this off.
+RESULT_CACHE = ResultCache()
+
+# How many extractions have 'started' and 'finished' in this process
+EXTRACTIONS = Counter()
+
 PARSERS = [
     custom.CustomParser,
     content.AMPParser,
@@ -33,18 +48,82 @@ PARSERS = [
 ]
 
 
-async def get_readembedable_result(url, **kwargs):
+def warmup():
+    """
+    Libraries and models that parsers use are loaded the first time
+    they're needed.  Call this to load them all now instead, so that the
+    first request doesn't have to wait for them.
+    """
+    lazy.load_all()
+    text.load_models()
+
+
+async def parse_page(page, result):
+    """
+    Run all of the PARSERS over a page that's been fetched.
+    """
+    # parse the page once, and share that with every parser
+    context = ParseContext(page, result.timings)
+    return await ParserScheduler(PARSERS).run(page, context, result)
+
+
+async def get_readembedable_result(url, pool=None, **kwargs):
+    """
+    Returns (page, result).  If a ParserPool is given, the parsing will
+    be done in one of its worker processes.
+
+    Pages from registered oEmbed providers (see OEmbedParser.register)
+    aren't fetched at all: the result comes from the provider's oembed,
+    and page is None (just like when the page can't be fetched - the
+    result's success says which).
+    """
+    EXTRACTIONS['started'] += 1
+    try:
+        return await _get_readembedable_result(url, pool, **kwargs)
+    finally:
+        EXTRACTIONS['finished'] += 1
+
+
+async def _get_readembedable_result(url, pool=None, **kwargs):
     if not isinstance(url, URL):
         url = URL(url)
 
     result = ParseResult(url)
-    page = await get_page(url, **kwargs)
+    if oembed.provider_endpoint(url) is not None:
+        with result.timings.time('fetch', 'oembed'):
+            embed = await oembed.get_embed_from_provider(url)
+        # if the provider doesn't have it, fall back to the page
+        if embed is not None:
+            LOG.info("Using the oembed from %s's provider", url)
+            result.set('canonical_url', str(url))
+            result.set('success', True)
+            oembed.apply_embed(result.for_parser('OEmbedParser'), embed)
+            return (None, result)
+
+    cache = RESULT_CACHE
+    entry = None if cache is None else cache.lookup(url)
+    if entry is not None:
+        headers = dict(kwargs.get('headers') or {})
+        headers.update(cache.conditional_headers(entry))
+        kwargs['headers'] = headers
+
+    with result.timings.time('fetch', 'page'):
+        page = await get_page(url, **kwargs)
 
     # this happens if we can't even fetch
     if page is None:
         LOG.error("Could not contact server for %s", url)
         return (None, result)
 
+    if entry is not None and page.status == 304:
+        LOG.info("%s hasn't changed, using cached result", url)
+        cache.revalidated += 1
+        timings = result.timings
+        result = copy.deepcopy(entry['result'])
+        result.timings = timings
+        result.set('url', str(url), 4)
+        return (page, result)
+
     result.set('canonical_url', page.url)
     # this happens if we can contact server but not a 200
     if page.status != 200:
@@ -52,16 +131,46 @@ async def get_readembedable_result(url, **kwargs):
         return (None, result)
 
     result.set('success', True)
-    for parser_class in PARSERS:
-        parser = parser_class(page)
-        result.set_parser_name(parser_class.__name__)
-        result = await parser.enrich(result)
-        # allow short circuiting
-        if not result.get('success'):
-            return (page, result)
+    if pool is not None:
+        result = await pool.parse(page, result)
+    else:
+        result = await parse_page(page, result)
+    if cache is not None:
+        cache.save(url, page, result)
     return (page, result)
 
 
 async def get_readembedable(url, **kwargs):
     _, result = await get_readembedable_result(url, **kwargs)
     return result.to_dict()
+
+
+def get_readembedable_many(urls, limit=20, limit_per_host=4, **kwargs):
+    """
+    Extract every url in urls (an iterable or an async iterator), with at
+    most limit extractions at once and at most limit_per_host for any one
+    host.  Returns an async iterator over (url, result dict) in the order
+    they finish:
+
+        async for url, result in get_readembedable_many(urls):
+            ...
+
+    Urls are only taken from urls as there's room for them, so urls can
+    be an endless stream.  Any other kwargs (like pool, or client for
+    the HTTPClient to use) are passed to get_readembedable_result.
+    """
+    async def extract(url):
+        try:
+            _, result = await get_readembedable_result(url, **kwargs)
+        # pylint: disable=broad-except
+        except Exception:
+            # one bad page shouldn't stop the whole batch
+            LOG.exception("Could not extract %s", url)
+            result = ParseResult(url)
+        return result.to_dict()
+
+    def host(url):
+        return URL(str(url)).host.lower()
+
+    return Batch(extract, urls, limit=limit, key=host,
+                 limit_per_key=limit_per_host)
@@ -1,11 +1,13 @@
 import heapq
 import asyncio
 
-from fastimage import detect
-
+from readembedability.cache import MemoryCache, MISSING
+from readembedability.lazy import LazyModule
 from readembedability.utils import unique, URL
 from readembedability.parsers.base import BaseParser
 
+detect = LazyModule('fastimage.detect')  # pylint: disable=invalid-name
+
 VIDEO_HOSTS = ['youtube.com', 'vimeo.com', 'youtube-nocookie.com']
 PDF_CONTENT = """
 <object data='%s' type='application/pdf'><p>PDF could not be displayed.
@@ -14,12 +16,93 @@ Visit <a href='%s'>%s</a> to download directly.</p></object>
 MIN_IMG_HEIGHT = 40
 MIN_IMG_WIDTH = 400
 MIN_IMG_RATIO = 3.0
+# A valid image at least this big (in pixels) is "large"
+LARGE_IMG_AREA = 600 * 315
+
+
+async def fetch_image_size(url):
+    """
+    Download just enough of the image at url to get its (width, height),
+    or None if it couldn't be.
+    """
+    try:
+        return await detect.get_size(url)
+    except detect.DownloadError:
+        return None
+
+
+class ImageProber:
+    """
+    Measures image sizes (using get_size) with at most concurrency
+    probes in flight.  Probing stops once deadline seconds have passed
+    since the first probe, or once is_enough(sizes) says that what has
+    been measured so far is good enough.
+    """
+    def __init__(self, get_size, concurrency=8, deadline=5.0,
+                 is_enough=None):
+        self.get_size = get_size
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.is_enough = is_enough or (lambda sizes: False)
+        self.sizes = {}
+        self.stopped = False
+        self._started = None
+        self._semaphore = None
+
+    def remaining(self):
+        loop = asyncio.get_event_loop()
+        if self._started is None:
+            self._started = loop.time()
+        return max(0, self.deadline - (loop.time() - self._started))
+
+    async def probe(self, urls):
+        """
+        Measure any urls that haven't been, in order, and return the
+        sizes of everything that's been measured so far.
+        """
+        urls = [url for url in unique(urls) if url not in self.sizes]
+        if self.stopped or not urls:
+            return self.sizes
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        pending = [asyncio.ensure_future(self._probe(url)) for url in urls]
+        try:
+            while pending and not self.stopped:
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.remaining(),
+                    return_when=asyncio.FIRST_COMPLETED)
+                # retrieve every error (so asyncio doesn't complain about
+                # the ones not raised), and raise the first
+                errors = [f.exception() for f in done if not f.cancelled()]
+                errors = [error for error in errors if error is not None]
+                if errors:
+                    raise errors[0]
+                # no done futures means we ran out of time
+                self.stopped = self.stopped or not done
+        finally:
+            for future in pending:
+                future.cancel()
+        return self.sizes
+
+    async def _probe(self, url):
+        async with self._semaphore:
+            if self.stopped:
+                return
+            _, size = await self.get_size(url)
+        self.sizes[url] = size
+        if self.is_enough(self.sizes):
+            self.stopped = True
 
 
 class ImageTypeParser(BaseParser):
     """
     If the url was an image, create content.
     """
+    READS = frozenset()
+    WRITES = frozenset(['content', 'primary_image', 'summary', 'keywords',
+                        'embed'])
+
     async def enrich(self, result):
         if self.response.is_image():
             result.set('content', "<img src='%s' />" % self.url, 3)
@@ -34,6 +117,9 @@ class PDFTypeParser(BaseParser):
     """
     If the url was an image, create content.
     """
+    READS = frozenset()
+    WRITES = frozenset(['content', 'primary_image', 'summary', 'keywords'])
+
     async def enrich(self, result):
         if self.response.is_pdf():
             content = PDF_CONTENT % (self.url, self.url, self.url)
@@ -45,6 +131,9 @@ class PDFTypeParser(BaseParser):
 
 
 class LastDitchMedia(BaseParser):
+    READS = frozenset(['content'])
+    WRITES = frozenset(['content'])
+
     async def enrich(self, result):
         if not result.has('content') or self.soup is None:
             return result
@@ -57,14 +146,39 @@ class LastDitchMedia(BaseParser):
                     content = str(iframe) + result.get('content')
                     result.set('content', content, 3)
 
-        # Take out primary image if present
-        if result.get('primary_image') is not None:
-            self.soup.delete('img', src=result.get('primary_image'))
-
         return result
 
 
 class ImagesParser(BaseParser):
+    READS = frozenset(['_candidate_images', 'primary_image'])
+    WRITES = frozenset(['primary_image', 'secondary_images'])
+
+    # Image sizes are remembered across requests, since the same logos,
+    # headshots, etc show up on lots of pages.  This can be replaced with
+    # any cache (like a readembedability.cache.DiskCache), or None.
+    SIZE_CACHE = MemoryCache(maxsize=10000, ttl=86400)
+    FAILED_SIZE_TTL = 3600
+    # What measures images that aren't in the cache (ParserPool workers
+    # replace this to have their parent process do it)
+    FETCH_SIZE = fetch_image_size
+
+    # The primary image and the secondary images, together
+    MAX_IMAGES = 5
+
+    # At most this many images are probed at once, and probing stops
+    # after this many seconds (or once there are enough large images to
+    # pick all MAX_IMAGES from - see enough_images).
+    PROBE_CONCURRENCY = 8
+    PROBE_DEADLINE = 5.0
+
+    def __init__(self, response, context=None):
+        super().__init__(response, context)
+        self.social = []
+        self.prober = ImageProber(self.get_image_size,
+                                  ImagesParser.PROBE_CONCURRENCY,
+                                  ImagesParser.PROBE_DEADLINE,
+                                  self.enough_images)
+
     def get_images(self):
         images = []
         for image in self.soup.find_all('img', src=True):
@@ -85,6 +199,43 @@ class ImagesParser(BaseParser):
         valid = valid and (float(width) / float(height)) < MIN_IMG_RATIO
         return valid and (float(height) / float(width)) < MIN_IMG_RATIO
 
+    @classmethod
+    def score(cls, url, size):
+        """
+        The score for an image, or None if it shouldn't be used at all.
+        """
+        if size is None or not ImagesParser.valid_dims(size[0], size[1]):
+            return None
+        # downgrade logos
+        return 0 if "logo" in url.lower() else (size[0] * size[1])
+
+    def enough_images(self, sizes):
+        """
+        Stop probing once every social image (the likely primary image)
+        has been measured, and there are enough large images for the
+        primary and all of the secondaries.
+        """
+        if any(url not in sizes for url in self.social):
+            return False
+        large = 0
+        for url, size in sizes.items():
+            score = ImagesParser.score(url, size)
+            if score is not None and score >= LARGE_IMG_AREA:
+                large += 1
+        return large >= ImagesParser.MAX_IMAGES
+
+    async def prefetch(self):
+        """
+        Start measuring the images on the page (social ones first);
+        candidate images from other parsers will be measured in enrich.
+        """
+        if self.soup is None:
+            return None
+        self.social = self.get_social_images()
+        sources = self.social + self.get_images()
+        sources = [s for s in unique(sources) if 'pixel' not in s][:100]
+        return await self.prober.probe(sources)
+
     async def enrich(self, result):
         """
         get all images, sort by likelihood of usefulness, then filter by
@@ -93,10 +244,12 @@ class ImagesParser(BaseParser):
         if self.soup is None:
             return result
 
+        await self.prefetched()
         sources = self.get_images() + result.get('_candidate_images', [])
-        social = self.get_social_images()
+        social = self.social
         sources += social
-        largest = await self.get_best(unique(sources), 5)
+        count = ImagesParser.MAX_IMAGES
+        largest = await self.get_best(unique(sources), count)
         if not largest:
             return result
 
@@ -121,27 +274,36 @@ class ImagesParser(BaseParser):
         """
         # get first 100 images that don't have "pixel" in the url
         sources = [s for s in sources if 'pixel' not in s][:100]
-        urlsizes = await asyncio.gather(*map(self.get_image_size, sources))
+        # this won't measure anything if the prober has already stopped
+        sizes = await self.prober.probe(sources)
         images = []
-        for url, size in urlsizes:
-            if size is not None and ImagesParser.valid_dims(size[0], size[1]):
-                # downgrade logos
-                adjsize = 0 if "logo" in url.lower() else (size[0] * size[1])
-                heapq.heappush(images, (adjsize, url))
+        for url in sources:
+            score = ImagesParser.score(url, sizes.get(url))
+            if score is not None:
+                heapq.heappush(images, (score, url))
         return [i[1] for i in heapq.nlargest(count, images)]
 
     def get_social_images(self):
-        metas = self.soup.find_all("meta", property="og:image", content=True)
+        index = self.soup.meta
+        metas = index.find_all("meta", property="og:image", content=True)
         images = [m['content'] for m in metas]
-        for meta in self.soup.find_all("meta", content=True):
+        for meta in index.find_all("meta", content=True):
             mname = "" if meta.get('name') is None else meta['name']
             if mname.startswith("twitter:image"):
                 images.append(meta['content'])
         return list(map(self.absoluteify, images))
 
     async def get_image_size(self, url):
-        try:
-            size = await detect.get_size(url)
-        except detect.DownloadError:
-            size = None
+        cache = ImagesParser.SIZE_CACHE
+        size = MISSING if cache is None else cache.get(url, MISSING)
+        if size is not MISSING:
+            return (url, size)
+
+        with self.timed('fetch', 'image'):
+            size = await ImagesParser.FETCH_SIZE(url)
+
+        if cache is not None:
+            # remember failures too, but not for as long
+            ttl = ImagesParser.FAILED_SIZE_TTL if size is None else None
+            cache.set(url, size, ttl)
         return (url, size)
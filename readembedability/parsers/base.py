@@ -1,14 +1,29 @@
+import asyncio
+
 from robostrippy.utils import absolute_url
 
-from readembedability.parsers.html import SmartHTMLDocument
+from readembedability.parsers.document import make_document
+from readembedability.parsers.sanitize import Sanitizer
+from readembedability.timing import Timings
 
 
-class BaseParser:
-    def __init__(self, response):
+class ParseContext:
+    """
+    Per-request state shared by every parser in the pipeline.  The
+    response body is parsed into a document exactly once here; parsers
+    that need to change the tree must work on a copy of it (see the
+    document's copy method).
+    """
+    def __init__(self, response, timings=None, sanitize=None):
         self.response = response
-        self.url = response.url
         self.content = response.body
         self.soup = None
+        # where parsers record how long their fetches took
+        self.timings = timings or Timings(response.url)
+        # the same html often gets sanitized by more than one parser
+        if sanitize is None:
+            sanitize = Sanitizer(timings=self.timings)
+        self.sanitize = sanitize
 
         if response.is_text():
             tbody = '<html><body><pre>%s</pre></body></html>'
@@ -16,11 +31,67 @@ class BaseParser:
 
         if not response.is_binary():
             if self.content and "html>" in self.content:
-                self.soup = SmartHTMLDocument(self.content)
+                with self.timings.time('parse', 'document'):
+                    self.soup = make_document(self.content)
+
+    def for_response(self, response):
+        """
+        A context for another response in the same request (like the AMP
+        version of the page), with its own document but this context's
+        timings and sanitizer.
+        """
+        return ParseContext(response, self.timings, self.sanitize)
+
+
+class BaseParser:
+    # The ParseResult properties this parser reads and writes, as
+    # frozensets.  These let the ParserScheduler run parsers that don't
+    # touch the same properties concurrently.  None means "could be
+    # anything", and the parser will run alone.
+    READS = None
+    WRITES = None
+
+    def __init__(self, response, context=None):
+        self.response = response
+        self.context = context or ParseContext(response)
+        self.url = response.url
+        self.content = self.context.content
+        self.soup = self.context.soup
+        self._prefetch = None
+
+    def sanitize(self, html):
+        """
+        Just like sanitize_html, but remembered for the rest of this
+        request (and possibly others - see Sanitizer).
+        """
+        return self.context.sanitize(html)
+
+    def timed(self, kind, name):
+        """
+        Time a with block, recording it with the request's timings.
+        """
+        return self.context.timings.time(kind, name)
 
     def absoluteify(self, path):
         return absolute_url(self.url, path)
 
+    async def prefetch(self):
+        """
+        Should do any network I/O that doesn't depend on the ParseResult
+        and return whatever enrich needs from it.  This is started early
+        so that it can overlap with other parsers.
+        """
+        return None
+
+    def prefetched(self):
+        """
+        Return a future for the result of prefetch, starting it if it
+        hasn't been started yet.
+        """
+        if self._prefetch is None:
+            self._prefetch = asyncio.ensure_future(self.prefetch())
+        return self._prefetch
+
     async def enrich(self, result):
         """
         Should enrich given ParseResult
@@ -1,22 +1,29 @@
-from readembedability.parsers.html import sanitize_html
 from readembedability.parsers.base import BaseParser
 from readembedability.io import get_page
 
 
 class AMPParser(BaseParser):
-    async def enrich(self, result):
+    READS = frozenset()
+    WRITES = frozenset(['_candidate_images', 'content'])
+
+    async def prefetch(self):
         if not self.soup:
-            return result
+            return None
 
-        links = self.soup.find_all("link", rel="amphtml", href=True)
+        links = self.soup.meta.find_all("link", rel="amphtml", href=True)
         if not links:
-            return result
+            return None
 
         href = self.absoluteify(links[0]['href'])
-        response = await get_page(href, mobile=True)
+        with self.timed('fetch', 'amp'):
+            return await get_page(href, mobile=True)
+
+    async def enrich(self, result):
+        response = await self.prefetched()
         if not response:
             return result
-        return AMPParser(response).amp_enrich(result)
+        context = self.context.for_response(response)
+        return AMPParser(response, context).amp_enrich(result)
 
     def amp_enrich(self, result):
         if not self.soup:
@@ -33,5 +40,5 @@ class AMPParser(BaseParser):
         elems = self.soup.find_all('article') + self.soup.find_all('section')
         content = " ".join(map(str, elems)).strip()
         if content:
-            result.set('content', sanitize_html(content), 1)
+            result.set('content', self.sanitize(content), 1)
         return result
@@ -0,0 +1,49 @@
+import re
+import codecs
+
+import lxml.html
+from newspaper import Article
+from newspaper.configuration import ArticleConfiguration
+from newspaper.parsers import Parser
+
+
+class FixedParser(Parser):
+    """
+    This exists because the original:
+    https://github.com/codelucas/newspaper/blob/master/newspaper/parsers.py
+
+    swallows the exception.
+    """
+    @classmethod
+    def fromstring(cls, html):
+        # next line shouldn't be necessary because
+        # we will always sanitize_html before passing in
+        # which will always result in unicode
+        # html = cls.get_unicode_html(html)
+        # pylint: disable=no-member
+        if html.startswith('<?'):
+            html = re.sub(r'^\<\?.*?\?\>', '', html, flags=re.DOTALL)
+
+        # lxml parser must have utf8.  We have unicode, though not
+        # necessarily utf8 - so if there's an issue with 'switching
+        # encoding' then we force utf8 encoding and try again
+        try:
+            cls.doc = lxml.html.fromstring(html)
+        # pylint: disable=no-member
+        except lxml.etree.XMLSyntaxError as error:
+            if 'switching encoding' not in str(error):
+                raise error
+            html = codecs.encode(html, 'utf-8')
+            cls.doc = lxml.html.fromstring(html)
+        return cls.doc
+
+
+class FixedArticleConfig(ArticleConfiguration):
+    def get_parser(self):
+        return FixedParser
+
+
+def make_article(url):
+    article = Article(url, config=FixedArticleConfig())
+    article.config.fetch_images = False
+    return article
@@ -1,20 +1,27 @@
-from readability.readability import Document
-
-from readembedability.parsers.html import sanitize_html, SmartHTMLDocument
+from readembedability.lazy import LazyModule
+from readembedability.parsers.document import make_document
 from readembedability.parsers.base import BaseParser
-from readembedability.parsers.html import SmartElem
 from readembedability.parsers.text import Summarizer
 
+# pylint: disable=invalid-name
+readability = LazyModule('readability.readability')
+
 
 class LastDitchParser(BaseParser):
     """
     If we've gotten nothing so far, try something that may be stupid.
     """
+    READS = frozenset(['content'])
+    WRITES = frozenset(['title', 'content'])
+
     async def enrich(self, result):
         if not self.soup:
             return result
 
-        result.set('title', self.soup.title.string, 0, 'textlength')
+        # a bs4 string would drag the whole document along when pickled
+        title = self.soup.title.string
+        title = None if title is None else str(title)
+        result.set('title', title, 0, 'textlength')
 
         if result.has('content'):
             return result
@@ -28,9 +35,9 @@ class LastDitchParser(BaseParser):
             html = self.soup.all_text()
 
         try:
-            doc = Document(html, url=self.url)
+            doc = readability.Document(html, url=self.url)
             content = doc.summary(html_partial=True)
-            result.set('content', sanitize_html(content))
+            result.set('content', self.sanitize(content))
         # pylint: disable=bare-except
         except:
             pass
@@ -39,8 +46,11 @@ class LastDitchParser(BaseParser):
 
 
 class FinalContentPass(BaseParser):
-    def __init__(self, result):
-        super().__init__(result)
+    READS = frozenset(['content', 'title', '_text'])
+    WRITES = frozenset(['content', 'slug'])
+
+    def __init__(self, response, context=None):
+        super().__init__(response, context)
         self.cbs = None
 
     async def enrich(self, result):
@@ -51,7 +61,7 @@ class FinalContentPass(BaseParser):
         if not result.has('content'):
             return result
 
-        self.cbs = SmartHTMLDocument(result.get('content'))
+        self.cbs = make_document(result.get('content'))
         result = self.remove_title(result)
         result = self.remove_social_links(result)
         result = self.add_slug(result)
@@ -59,7 +69,10 @@ class FinalContentPass(BaseParser):
 
     # pylint: disable=no-self-use
     def add_slug(self, result):
-        sumzer = Summarizer(result.get('_text'), result.get('title'))
+        # images and pdfs have content, but no text
+        if result.get('_text') is None:
+            return result
+        sumzer = Summarizer.for_result(result)
         result.set('slug', sumzer.slug(8), 3)
         return result
 
@@ -86,10 +99,10 @@ class FinalContentPass(BaseParser):
             # if first text node is title, remove it
             if tnodes and tnodes[0].lower().strip() == title:
                 node = tnodes[0]
-                content = SmartElem(node.parent).all_text().lower()
+                content = self.cbs.node_text(node.parent).lower()
                 while node.parent is not None and content == title:
                     node = node.parent
-                    content = SmartElem(node.parent).all_text().lower()
+                    content = self.cbs.node_text(node.parent).lower()
                 node.extract()
                 result.set('content', str(self.cbs), 3)
         return result
@@ -1,52 +1,14 @@
-import re
-import codecs
-
-import lxml.html
 # pylint: disable=no-name-in-module
 from lxml.etree import tostring
-from newspaper import Article
-from newspaper.configuration import ArticleConfiguration
-from newspaper.parsers import Parser
 
+from readembedability.lazy import LazyModule
 from readembedability.parsers.base import BaseParser
 from readembedability.parsers.text import Summarizer
-from readembedability.parsers.html import sanitize_html
-
-
-class FixedParser(Parser):
-    """
-    This exists because the original:
-    https://github.com/codelucas/newspaper/blob/master/newspaper/parsers.py
-
-    swallows the exception.
-    """
-    @classmethod
-    def fromstring(cls, html):
-        # next line shouldn't be necessary because
-        # we will always sanitize_html before passing in
-        # which will always result in unicode
-        # html = cls.get_unicode_html(html)
-        # pylint: disable=no-member
-        if html.startswith('<?'):
-            html = re.sub(r'^\<\?.*?\?\>', '', html, flags=re.DOTALL)
-
-        # lxml parser must have utf8.  We have unicode, though not
-        # necessarily utf8 - so if there's an issue with 'switching
-        # encoding' then we force utf8 encoding and try again
-        try:
-            cls.doc = lxml.html.fromstring(html)
-        # pylint: disable=no-member
-        except lxml.etree.XMLSyntaxError as error:
-            if 'switching encoding' not in str(error):
-                raise error
-            html = codecs.encode(html, 'utf-8')
-            cls.doc = lxml.html.fromstring(html)
-        return cls.doc
-
 
-class FixedArticleConfig(ArticleConfiguration):
-    def get_parser(self):
-        return FixedParser
+# newspaper is slow to import, so the parts of it we use (in .article)
+# are imported the first time they're needed
+# pylint: disable=invalid-name
+articles = LazyModule('readembedability.parsers.content.article')
 
 
 class NewspaperParser(BaseParser):
@@ -55,12 +17,11 @@ class NewspaperParser(BaseParser):
         if not self.soup:
             return result
 
-        sanitized = sanitize_html(self.response.body)
+        sanitized = self.sanitize(self.response.body)
         if not sanitized:
             return result
 
-        article = Article(self.url, config=FixedArticleConfig())
-        article.config.fetch_images = False
+        article = articles.make_article(self.url)
         article.set_html(sanitized)
         article.parse()
 
@@ -70,10 +31,10 @@ class NewspaperParser(BaseParser):
             result.set('subtitle', article.meta_description, 2, 'textlength')
 
         if article.article_html:
-            sanitized = sanitize_html(article.article_html)
+            sanitized = self.sanitize(article.article_html)
             result.set('content', sanitized, 0, 'textlength')
         elif article.top_node is not None:
-            sanitized = sanitize_html(tostring(article.top_node))
+            sanitized = self.sanitize(tostring(article.top_node))
             result.set('content', sanitized, 2)
 
         if article.authors:
@@ -1,13 +1,17 @@
-from readability.readability import Document
-
-from readembedability.parsers.html import sanitize_html
+from readembedability.lazy import LazyModule
 from readembedability.parsers.base import BaseParser
 
+# pylint: disable=invalid-name
+readability = LazyModule('readability.readability')
+
 
 class ReadableLxmlParser(BaseParser):
+    READS = frozenset()
+    WRITES = frozenset(['content', 'title'])
+
     async def enrich(self, result):
-        doc = Document(self.content, url=self.url)
+        doc = readability.Document(self.content, url=self.url)
         content = doc.summary(html_partial=True)
-        result.set('content', sanitize_html(content), 2, 'textquality')
+        result.set('content', self.sanitize(content), 2, 'textquality')
         result.set('title', doc.short_title(), 1, 'textlength')
         return result
@@ -19,7 +19,8 @@ class CustomParser(BaseParser):
     async def enrich(self, result):
         for regex, fclass in CustomParser.PARSERS:
             if regex.match(self.response.url) is not None:
-                return await fclass(self.response).enrich(result)
+                parser = fclass(self.response, self.context)
+                return await parser.enrich(result)
         return result
 
 
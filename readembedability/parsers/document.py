@@ -0,0 +1,24 @@
+import os
+
+from readembedability.parsers.html import SmartHTMLDocument
+from readembedability.parsers.lxmlhtml import LxmlHTMLDocument
+
+BACKENDS = {
+    'bs4': SmartHTMLDocument,
+    'lxml': LxmlHTMLDocument
+}
+
+# The backend used by make_document when one isn't given.  Set this, or
+# the READEMBEDABILITY_HTML_BACKEND environment variable, to 'lxml' to
+# skip BeautifulSoup entirely.
+BACKEND = os.environ.get('READEMBEDABILITY_HTML_BACKEND', 'bs4')
+
+
+def make_document(html, backend=None):
+    """
+    Parse html into a document using the configured backend.
+    """
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError("Unknown HTML backend %s" % backend)
+    return BACKENDS[backend](html)
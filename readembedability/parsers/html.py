@@ -1,14 +1,14 @@
+import copy
 import re
 
 from readembedability.utils import URL
+from readembedability.parsers.metaindex import MetaIndex
 
 from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag, Comment, ProcessingInstruction
 from bs4.element import Declaration, CData, Doctype
 
-import tidylib
-
-CLEAN_ELEMS = [
+CLEAN_ELEMS = frozenset([
     "a",
     "article",
     "b",
@@ -47,39 +47,76 @@ CLEAN_ELEMS = [
     "tr",
     "ul",
     "video"
-]
+])
 
 CLEAN_ELEM_ATTRS = {
-    'a': ['href'],
-    'img': ['src'],
-    'iframe': ['src'],
-    'source': ['src', 'type'],
-    'video': ['height', 'width']
+    'a': frozenset(['href']),
+    'img': frozenset(['src']),
+    'iframe': frozenset(['src']),
+    'source': frozenset(['src', 'type']),
+    'video': frozenset(['height', 'width'])
 }
 
 
-def tidy_html(html):
-    doc, _ = tidylib.tidy_fragment(html, options={'indent': 0})
-    return doc
-
-
-def sanitize_html(html):
-    # remove unknown silly elements, like <cnt> in
-    # washingtonexaminer articles
-    html = tidy_html(html)
-    soup = BeautifulSoup(html, 'lxml')
-    if not soup.html or not soup.html.body:
-        return ""
-
-    for elem in list(soup.html.body.descendants):
-        smart = SmartElem(elem)
-        if not smart.is_virtuous():
-            smart.delete()
-        else:
-            smart.clean()
-
-    html = "".join([str(c) for c in soup.html.body.children])
-    return tidy_html(html)
+def is_virtuous_text(text):
+    """
+    Is this text (from a text node) likely to be useful content?
+    """
+    text = text.lower()
+    verbotten = [
+        'advertisement',
+        'photo by',
+        'continue reading',
+        'read more',
+        'subscribe'
+    ]
+    for verb in verbotten:
+        if text.startswith(verb):
+            return False
+    return len(text) > 0
+
+
+class TextIndex:
+    """
+    A document's text and every node's share of it, built in one walk of
+    the tree (in document order) instead of walking every node's
+    descendants again.  Text nodes are added with add_text.  Elements are
+    opened (before anything inside them is added) and closed, and their
+    text is a slice of all of the text.
+    """
+    def __init__(self):
+        self.pieces = []
+        # offsets[i] is where the i-th piece starts in the joined text
+        self.offsets = [0]
+        # a text node's string, or [start, end] pieces for an element
+        self.nodes = []
+
+    def add_text(self, text):
+        self.pieces.append(" " + text)
+        self.offsets.append(self.offsets[-1] + len(text) + 1)
+        self.nodes.append(text)
+
+    def open(self):
+        self.nodes.append([len(self.pieces), None])
+        return len(self.nodes) - 1
+
+    def close(self, index):
+        self.nodes[index][1] = len(self.pieces)
+
+    def build(self):
+        """
+        Return the text of everything, and the non-empty text chunks of
+        each node (see text_chunks).
+        """
+        text = "".join(self.pieces)
+        chunks = []
+        for node in self.nodes:
+            if isinstance(node, list):
+                start, end = self.offsets[node[0]], self.offsets[node[1]]
+                node = text[start:end].strip()
+            if node != "":
+                chunks.append(node)
+        return text.strip(), chunks
 
 
 class SmartElem:
@@ -145,7 +182,7 @@ class SmartElem:
         """
         text = self.elem.get_text().lower().strip()
         href = self.attrs.get('href')
-        virttext = self._is_virtuous_text(text)
+        virttext = is_virtuous_text(text)
         if not href or href.strip() == '#' or not virttext:
             return False
 
@@ -159,28 +196,13 @@ class SmartElem:
             return False
         return True
 
-    # pylint: disable=no-self-use
-    def _is_virtuous_text(self, text):
-        text = text.lower()
-        verbotten = [
-            'advertisement',
-            'photo by',
-            'continue reading',
-            'read more',
-            'subscribe'
-        ]
-        for verb in verbotten:
-            if text.startswith(verb):
-                return False
-        return len(text) > 0
-
     def is_virtuous(self):
         """
         Is this node useful?  Does it likely contain good information?
         """
         if self.is_tag() and self._is_virtuous_tag():
             return True
-        elif self.is_text() and self._is_virtuous_text(str(self.elem)):
+        elif self.is_text() and is_virtuous_text(str(self.elem)):
             return True
         return False
 
@@ -213,6 +235,19 @@ class SmartElem:
 class SmartHTMLDocument:
     def __init__(self, html):
         self.soup = BeautifulSoup(html, 'lxml')
+        self._text_index = None
+        self._meta = None
+
+    def copy(self):
+        """
+        Return an independent copy of this document, for callers that
+        need to change a tree that is shared with other parsers.
+        """
+        clone = SmartHTMLDocument.__new__(SmartHTMLDocument)
+        clone.soup = copy.copy(self.soup)
+        clone._text_index = None
+        clone._meta = None
+        return clone
 
     @property
     def body(self):
@@ -242,16 +277,22 @@ class SmartHTMLDocument:
     def delete(self, *args, **kwargs):
         for elem in self.soup.find_all(*args, attrs=kwargs):
             elem.extract()
+        self._text_index = None
+        self._meta = None
+
+    @property
+    def meta(self):
+        """
+        A MetaIndex of this document, built the first time it's needed.
+        This is reset by delete, but not by changes made to elements
+        directly.
+        """
+        if self._meta is None:
+            self._meta = MetaIndex(self)
+        return self._meta
 
     def get_elem_value(self, _name, attr=None, **attrs):
-        for elem in self.find_all(_name, **attrs):
-            if attr is None:
-                txt = elem.get_text().strip()
-                if txt != "":
-                    return txt
-            elif elem.has_attr(attr) and elem[attr].strip():
-                return elem[attr].strip()
-        return None
+        return self.meta.get_elem_value(_name, attr, **attrs)
 
     def coalesce_elem_value(self, attempts):
         """
@@ -259,19 +300,46 @@ class SmartHTMLDocument:
         you only care about the first non-null result, just call this
         function with tuples of your args to get_elem_value.
         """
-        for attempt in map(list, attempts):
-            kwargs = {}
-            if len(attempt) == 3:
-                kwargs = attempt.pop()
-            if len(attempt) == 2:
-                kwargs['attr'] = attempt.pop()
-            result = self.get_elem_value(attempt[0], **kwargs)
-            if result:
-                return result
-        return None
+        return self.meta.coalesce_elem_value(attempts)
+
+    @property
+    def text_index(self):
+        """
+        (all_text, text_chunks), computed in one walk of the tree the
+        first time either is needed.  This is reset by delete, but not by
+        changes made to elements directly.
+        """
+        if self._text_index is None:
+            self._text_index = self._index_text()
+        return self._text_index
+
+    def _index_text(self):
+        index = TextIndex()
+        if self.soup.html is None:
+            return index.build()
+        stack = [(iter(self.soup.html.children), None)]
+        while stack:
+            kids, opened = stack[-1]
+            child = next(kids, None)
+            if child is None:
+                stack.pop()
+                if opened is not None:
+                    index.close(opened)
+            elif isinstance(child, Tag):
+                stack.append((iter(child.children), index.open()))
+            elif SmartElem(child).is_text():
+                index.add_text(str(child))
+        return index.build()
 
     def all_text(self):
-        return SmartElem(self.soup.html).all_text()
+        return self.text_index[0]
+
+    # pylint: disable=no-self-use
+    def node_text(self, node):
+        """
+        All of the text in the given node (or "" if node is None).
+        """
+        return SmartElem(node).all_text()
 
     def get_text_nodes(self):
         """
@@ -294,12 +362,7 @@ class SmartHTMLDocument:
         <p>one <b>two</b></p> will return:
         ['one two', 'two']
         """
-        chunks = []
-        for child in self.soup.html.descendants:
-            txt = SmartElem(child).all_text()
-            if txt != "":
-                chunks.append(txt)
-        return chunks
+        return list(self.text_index[1])
 
     def __str__(self):
         if self.soup.html is None or self.soup.html.body is None:
@@ -0,0 +1,388 @@
+import copy
+import re
+from html import escape
+
+import lxml.html
+# pylint: disable=no-name-in-module
+from lxml.etree import ParserError
+
+from readembedability.parsers.html import is_virtuous_text, TextIndex
+from readembedability.parsers.metaindex import MetaIndex, match_name
+from readembedability.parsers.metaindex import match_value
+
+# These are the attributes bs4 treats as whitespace separated lists
+MULTI_VALUED_ATTRS = {
+    '*': frozenset(['class', 'accesskey', 'dropzone']),
+    'a': frozenset(['rel', 'rev']),
+    'link': frozenset(['rel', 'rev']),
+    'td': frozenset(['headers']),
+    'th': frozenset(['headers']),
+    'form': frozenset(['accept-charset']),
+    'object': frozenset(['archive']),
+    'area': frozenset(['rel']),
+    'icon': frozenset(['sizes']),
+    'iframe': frozenset(['sandbox']),
+    'output': frozenset(['for'])
+}
+
+NON_TEXT_PARENTS = frozenset(['script', 'style'])
+
+
+def is_element(node):
+    # comments and processing instructions have a function for a tag
+    return isinstance(node.tag, str)
+
+
+class LxmlText(str):
+    """
+    A text node.  lxml keeps text on the element before (tail) or
+    around (text) it, so remember which one this is.
+    """
+    def __new__(cls, value, owner, is_tail):
+        text = super().__new__(cls, value)
+        text.owner = owner
+        text.is_tail = is_tail
+        return text
+
+    @property
+    def parent(self):
+        if self.is_tail:
+            parent = self.owner.getparent()
+            return None if parent is None else LxmlElem(parent)
+        return LxmlElem(self.owner)
+
+    def is_text(self):
+        """
+        Is this real text (as opposed to javascript or css)?
+        """
+        parent = self.owner.getparent() if self.is_tail else self.owner
+        return parent is not None and parent.tag not in NON_TEXT_PARENTS
+
+    def extract(self):
+        if self.is_tail:
+            self.owner.tail = None
+        else:
+            self.owner.text = None
+        return self
+
+
+def descendants(elem):
+    """
+    Walk everything under elem in document order, just like bs4's
+    Tag.descendants: elements, comments, and text nodes (as LxmlText).
+    """
+    if elem.text:
+        yield LxmlText(elem.text, elem, False)
+    stack = [(elem, iter(elem))]
+    while stack:
+        parent, kids = stack[-1]
+        child = next(kids, None)
+        if child is None:
+            stack.pop()
+            if parent is not elem and parent.tail:
+                yield LxmlText(parent.tail, parent, True)
+            continue
+        yield child
+        if is_element(child):
+            if child.text:
+                yield LxmlText(child.text, child, False)
+            stack.append((child, iter(child)))
+        elif child.tail:
+            yield LxmlText(child.tail, child, True)
+
+
+def text_nodes(elem):
+    for node in descendants(elem):
+        if isinstance(node, LxmlText) and node.is_text():
+            yield node
+
+
+def remove_elem(elem):
+    """
+    Remove elem from its tree but keep the text that follows it.
+    """
+    parent = elem.getparent()
+    if parent is None:
+        return
+    if elem.tail:
+        previous = elem.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + elem.tail
+        else:
+            parent.text = (parent.text or "") + elem.tail
+    parent.remove(elem)
+
+
+class LxmlElem:
+    def __init__(self, elem):
+        self.elem = elem
+        self._attrs = None
+
+    @property
+    def name(self):
+        return self.elem.tag
+
+    @property
+    def attrs(self):
+        if self._attrs is None:
+            multis = MULTI_VALUED_ATTRS['*']
+            multis = multis | MULTI_VALUED_ATTRS.get(self.name, frozenset())
+            self._attrs = {}
+            for key, value in self.elem.attrib.items():
+                if key in multis:
+                    value = value.split()
+                self._attrs[key] = value
+        return self._attrs
+
+    @property
+    def parent(self):
+        parent = self.elem.getparent()
+        return None if parent is None else LxmlElem(parent)
+
+    @property
+    def string(self):
+        """
+        Like bs4's Tag.string: the text if this element only has a
+        single child (text or otherwise), else None.
+        """
+        kids = list(self.elem)
+        if not kids:
+            return self.elem.text
+        if self.elem.text or len(kids) > 1 or kids[0].tail:
+            return None
+        if not is_element(kids[0]):
+            return kids[0].text
+        return LxmlElem(kids[0]).string
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key):
+        return key in self.attrs
+
+    def matches(self, name, attrs):
+        if not match_name(self.name, name):
+            return False
+        for key, target in attrs.items():
+            if not match_value(self.attrs.get(key), target):
+                return False
+        return True
+
+    def find_parents(self, name=None, limit=None, **attrs):
+        results = []
+        for parent in self.elem.iterancestors():
+            if LxmlElem(parent).matches(name, attrs):
+                results.append(LxmlElem(parent))
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def get_text(self):
+        return "".join(self.elem.itertext())
+
+    def all_text(self):
+        return " ".join(text_nodes(self.elem)).strip()
+
+    def extract(self):
+        remove_elem(self.elem)
+        return self
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __contains__(self, key):
+        return key in self.attrs
+
+    def __eq__(self, other):
+        return isinstance(other, LxmlElem) and other.elem is self.elem
+
+    def __hash__(self):
+        return hash(self.elem)
+
+    def __str__(self):
+        return lxml.html.tostring(self.elem, encoding='unicode',
+                                  with_tail=False)
+
+    __repr__ = __str__
+
+
+class LxmlHTMLDocument:
+    """
+    A SmartHTMLDocument work-alike built directly on lxml.html, without
+    the BeautifulSoup layer in between.  Elements returned from find_all
+    are wrapped in LxmlElem, which supports the part of the bs4 Tag API
+    that the parsers rely on.
+    """
+    def __init__(self, html):
+        self.root = parse_html(html)
+        self._text_index = None
+        self._meta = None
+
+    def copy(self):
+        """
+        Return an independent copy of this document, for callers that
+        need to change a tree that is shared with other parsers.
+        """
+        clone = LxmlHTMLDocument.__new__(LxmlHTMLDocument)
+        clone.root = copy.deepcopy(self.root)
+        clone._text_index = None
+        clone._meta = None
+        return clone
+
+    @property
+    def body(self):
+        if self.root is None:
+            return None
+        body = self.root.find('body')
+        return None if body is None else LxmlElem(body)
+
+    @property
+    def title(self):
+        if self.root is None:
+            return None
+        title = self.root.find('.//title')
+        return None if title is None else LxmlElem(title)
+
+    def find_all_loose(self, *args, **kwargs):
+        """
+        Make all string kwarg values regexes.  This is useful in cases where
+        you want itemprop='articleBody text' to be matched by 'articleBody'
+        """
+        # pylint: disable=not-an-iterable
+        loosekw = {}
+        for key, value in kwargs.items():
+            value = re.compile(value) if isinstance(value, str) else value
+            loosekw[key] = value
+        return self.find_all(*args, **loosekw)
+
+    def find_all(self, *args, **kwargs):
+        if self.root is None:
+            return []
+        # kwargs are all attributes (which may include 'name')
+        name = args[0] if args else None
+        results = []
+        for elem in self.root.iter():
+            if is_element(elem):
+                wrapped = LxmlElem(elem)
+                if wrapped.matches(name, kwargs):
+                    results.append(wrapped)
+        return results
+
+    def delete(self, *args, **kwargs):
+        for elem in self.find_all(*args, **kwargs):
+            elem.extract()
+        self._text_index = None
+        self._meta = None
+
+    @property
+    def meta(self):
+        """
+        A MetaIndex of this document, built the first time it's needed.
+        This is reset by delete, but not by changes made to elements
+        directly.
+        """
+        if self._meta is None:
+            self._meta = MetaIndex(self)
+        return self._meta
+
+    def get_elem_value(self, _name, attr=None, **attrs):
+        return self.meta.get_elem_value(_name, attr, **attrs)
+
+    def coalesce_elem_value(self, attempts):
+        """
+        Given lots of get_elem_value calls you'd like to make but
+        you only care about the first non-null result, just call this
+        function with tuples of your args to get_elem_value.
+        """
+        return self.meta.coalesce_elem_value(attempts)
+
+    @property
+    def text_index(self):
+        """
+        (all_text, text_chunks), computed in one walk of the tree the
+        first time either is needed.  This is reset by delete, but not by
+        changes made to elements directly.
+        """
+        if self._text_index is None:
+            self._text_index = self._index_text()
+        return self._text_index
+
+    def _index_text(self):
+        index = TextIndex()
+        if self.root is None:
+            return index.build()
+
+        def add_text(text, parent):
+            if text and parent.tag not in NON_TEXT_PARENTS:
+                index.add_text(text)
+
+        add_text(self.root.text, self.root)
+        stack = [(self.root, iter(self.root), None)]
+        while stack:
+            parent, kids, opened = stack[-1]
+            child = next(kids, None)
+            if child is None:
+                stack.pop()
+                if opened is not None:
+                    index.close(opened)
+                    add_text(parent.tail, parent.getparent())
+            elif is_element(child):
+                stack.append((child, iter(child), index.open()))
+                add_text(child.text, child)
+            else:
+                # a comment or processing instruction
+                add_text(child.tail, parent)
+        return index.build()
+
+    def all_text(self):
+        return self.text_index[0]
+
+    # pylint: disable=no-self-use
+    def node_text(self, node):
+        """
+        All of the text in the given node (or "" if node is None).
+        """
+        if node is None:
+            return ""
+        if isinstance(node, LxmlText):
+            return str(node) if node.is_text() else ""
+        return node.all_text()
+
+    def get_text_nodes(self):
+        """
+        Return all non-empty, non-js, non-css, non-comment
+        text nodes
+        """
+        if self.root is None:
+            return []
+        return [t for t in text_nodes(self.root) if is_virtuous_text(t)]
+
+    def text_chunks(self):
+        """
+        Return recursive chunks of text.  For instance:
+        <p>one <b>two</b></p> will return:
+        ['one two', 'two']
+        """
+        return list(self.text_index[1])
+
+    def __str__(self):
+        body = self.body
+        if body is None:
+            return ""
+        parts = [escape(body.elem.text, False)] if body.elem.text else []
+        for kid in body.elem:
+            parts.append(lxml.html.tostring(kid, encoding='unicode'))
+        return "".join(parts)
+
+
+def parse_html(html):
+    """
+    Parse html into an lxml tree, returning None for empty documents.
+    """
+    try:
+        return lxml.html.document_fromstring(html)
+    except ParserError:
+        return None
+    except ValueError:
+        # lxml refuses unicode strings with an encoding declaration
+        return parse_html(html.encode('utf-8'))
@@ -1,16 +1,15 @@
-import json
 from datetime import datetime
-import logging
 
 from readembedability.parsers.text import parse_authors
-from readembedability.parsers.html import sanitize_html, SmartHTMLDocument
+from readembedability.parsers.document import make_document
 from readembedability.utils import unique, longest, parse_date, URL, flatten
 from readembedability.parsers.base import BaseParser
 
-LOG = logging.getLogger(__name__)
-
 
 class AuthorParser(BaseParser):
+    READS = frozenset()
+    WRITES = frozenset(['authors'])
+
     # pylint: disable=no-self-use
     def has_byline_prefix(self, prefix):
         prefix = prefix.lower()
@@ -61,6 +60,9 @@ class AuthorParser(BaseParser):
 
 
 class DatePublishedParser(BaseParser):
+    READS = frozenset()
+    WRITES = frozenset(['published_at'])
+
     def get_standards(self):
         attempts = [
             (None, None, {'itemprop': 'datePublished'}),
@@ -96,33 +98,38 @@ class DatePublishedParser(BaseParser):
 
 
 class StandardsParser(BaseParser):
+    READS = frozenset(['keywords'])
+    WRITES = frozenset(['content', '_text', 'keywords'])
+
     async def enrich(self, result):
         if self.soup is None:
             return result
 
         atypes = ["http://schema.org/Article", "http://schema.org/BlogPosting"]
-        articles = self.soup.find_all(itemtype=atypes)
+        articles = self.soup.meta.find_all(itemtype=atypes)
         content = longest(map(str, articles))
         if content is not None:
-            content = sanitize_html(content)
+            content = self.sanitize(content)
 
-        parts = self.soup.find_all_loose(itemprop='articleBody')
+        parts = self.soup.meta.find_all_loose(itemprop='articleBody')
         if parts:
-            content = sanitize_html("".join(map(str, parts)))
+            content = self.sanitize("".join(map(str, parts)))
 
         if content is not None and len(content.strip()) > 5:
             result.set('content', content, 3)
-            result.set('_text', SmartHTMLDocument(content).all_text(), 3)
+            result.set('_text', make_document(content).all_text(), 3)
 
         keywords = result.get('keywords')
-        for genre in self.soup.find_all_loose(itemprop="genre", content=True):
+        genres = self.soup.meta.find_all_loose(itemprop="genre", content=True)
+        for genre in genres:
             keywords.append(genre['content'].strip())
 
-        tags = self.soup.find_all('meta', name='sailthru.tags', content=True)
+        meta = self.soup.meta
+        tags = meta.find_all('meta', name='sailthru.tags', content=True)
         for tag in tags:
             keywords += [t.strip() for t in tag['content'].split(',')]
 
-        tags = self.soup.find_all('meta', property='article:tag', content=True)
+        tags = meta.find_all('meta', property='article:tag', content=True)
         for tag in tags:
             keywords.append(tag['content'].strip())
         result.set('keywords', unique(keywords))
@@ -131,41 +138,36 @@ class StandardsParser(BaseParser):
 
 
 class SocialParser(BaseParser):
+    READS = frozenset()
+    WRITES = frozenset(['title', 'summary'])
+
     async def enrich(self, result):
         if not self.soup:
             return result
 
-        ogtitle = self.soup.find_all("meta", property="og:title", content=True)
+        meta = self.soup.meta
+        ogtitle = meta.find_all("meta", property="og:title", content=True)
         if ogtitle:
             result.set('title', ogtitle[0]['content'], 2)
 
         attrs = {'property': 'og:description', 'content': True}
-        ogdesc = self.soup.find_all("meta", **attrs)
+        ogdesc = meta.find_all("meta", **attrs)
         if ogdesc:
             result.set('summary', ogdesc[0]['content'], 0, 'textlength')
         return result
 
 
 class LDJSONParser(BaseParser):
+    READS = frozenset()
+    WRITES = frozenset(['authors', 'published_at', 'title'])
+
     async def enrich(self, result):
         if not self.soup:
             return result
 
-        for elem in self.soup.find_all('script', type="application/ld+json"):
-            datas = []
-            try:
-                datas = json.loads(elem.get_text().strip())
-                # if it's a dict, put it in a list, which most are
-                if isinstance(datas, dict):
-                    datas = [datas]
-                # if it's not a list at this point, it's probably junk
-                if not isinstance(datas, list):
-                    datas = []
-            except json.decoder.JSONDecodeError as err:
-                LOG.error(err)
-            for obj in datas:
-                if obj.get('@type') == 'NewsArticle':
-                    result = self.eat_news_article(obj, result)
+        for obj in self.soup.meta.ldjson:
+            if obj.get('@type') == 'NewsArticle':
+                result = self.eat_news_article(obj, result)
         return result
 
     # pylint: disable=no-self-use
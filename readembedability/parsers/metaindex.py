@@ -0,0 +1,193 @@
+import json
+import logging
+import re
+from collections import defaultdict
+
+LOG = logging.getLogger(__name__)
+
+# Elements are indexed by the values of these attributes, since they're
+# what metadata (<meta>, <link>, microdata, etc) is looked up by.
+INDEXED_ATTRS = frozenset(['name', 'property', 'itemprop', 'rel', 'type',
+                           'itemtype'])
+
+
+def match_value(value, target):
+    """
+    Match an attribute value against a find_all target the way bs4 does:
+    target can be True (present), None (absent), a string, a compiled
+    regex, a callable, or a list of any of those.
+    """
+    if target is True:
+        return value is not None
+    if target is None or target is False:
+        return value is None
+    if isinstance(target, (list, tuple, set, frozenset)):
+        return any(match_value(value, item) for item in target)
+    if value is None:
+        return False
+    if isinstance(value, list):
+        if any(_match_string(item, target) for item in value):
+            return True
+        value = " ".join(value)
+    return _match_string(value, target)
+
+
+def _match_string(value, target):
+    if hasattr(target, 'search'):
+        return target.search(value) is not None
+    if callable(target):
+        return bool(target(value))
+    return value == str(target)
+
+
+def match_name(name, target):
+    if target is None or target is True:
+        return True
+    return match_value(name, target)
+
+
+def plain_values(target):
+    """
+    The strings a find_all target matches exactly, or None if it could
+    match something else (like a regex or True).
+    """
+    if isinstance(target, str):
+        return [target]
+    if isinstance(target, (list, tuple)):
+        if all(isinstance(item, str) for item in target):
+            return list(target)
+    return None
+
+
+def present(target):
+    """
+    Can target only match attributes that are there?
+    """
+    return target is True or hasattr(target, 'search')
+
+
+class MetaIndex:
+    """
+    Every element in a document, indexed (in one walk of the document) by
+    tag name and by the values of INDEXED_ATTRS, along with any JSON-LD
+    in the document.  Its find_all and get_elem_value work just like the
+    document's, but only look at elements that could possibly match.
+    """
+    def __init__(self, doc):
+        self.elements = doc.find_all(True)
+        self.by_name = defaultdict(list)
+        self.by_attr = defaultdict(list)
+        self.with_attr = defaultdict(list)
+        self._ldjson = None
+        for index, elem in enumerate(self.elements):
+            self.by_name[elem.name].append(index)
+            for attr in INDEXED_ATTRS & set(elem.attrs.keys()):
+                self.with_attr[attr].append(index)
+                value = elem.attrs[attr]
+                # multi-valued attributes (like rel) match on any one
+                # value or all of them, just like with bs4
+                if isinstance(value, list):
+                    values = set(value + [" ".join(value)])
+                else:
+                    values = set([value])
+                for value in values:
+                    self.by_attr[(attr, value)].append(index)
+
+    def _candidates(self, name, attrs):
+        """
+        The indexes of the elements that could match, in document order.
+        """
+        best = None
+        for key, target in attrs.items():
+            values = plain_values(target)
+            if key in INDEXED_ATTRS and values is not None:
+                found = set()
+                for value in values:
+                    found.update(self.by_attr.get((key, value), []))
+                if best is None or len(found) < len(best):
+                    best = found
+            elif key in INDEXED_ATTRS and best is None and present(target):
+                best = set(self.with_attr.get(key, []))
+
+        names = plain_values(name)
+        if best is None and names is not None:
+            best = set()
+            for value in names:
+                best.update(self.by_name.get(value, []))
+        if best is None:
+            return range(len(self.elements))
+        return sorted(best)
+
+    def find_all(self, *args, **kwargs):
+        name = args[0] if args else None
+        results = []
+        for index in self._candidates(name, kwargs):
+            elem = self.elements[index]
+            if not match_name(elem.name, name):
+                continue
+            attrs = elem.attrs
+            if all(match_value(attrs.get(k), t) for k, t in kwargs.items()):
+                results.append(elem)
+        return results
+
+    def find_all_loose(self, *args, **kwargs):
+        """
+        Just like the document's find_all_loose.
+        """
+        # pylint: disable=not-an-iterable
+        loosekw = {}
+        for key, value in kwargs.items():
+            value = re.compile(value) if isinstance(value, str) else value
+            loosekw[key] = value
+        return self.find_all(*args, **loosekw)
+
+    def get_elem_value(self, _name, attr=None, **attrs):
+        for elem in self.find_all(_name, **attrs):
+            if attr is None:
+                txt = elem.get_text().strip()
+                if txt != "":
+                    return txt
+            elif elem.has_attr(attr) and elem[attr].strip():
+                return elem[attr].strip()
+        return None
+
+    def coalesce_elem_value(self, attempts):
+        """
+        Given lots of get_elem_value calls you'd like to make but
+        you only care about the first non-null result, just call this
+        function with tuples of your args to get_elem_value.
+        """
+        for attempt in map(list, attempts):
+            kwargs = {}
+            if len(attempt) == 3:
+                kwargs = attempt.pop()
+            if len(attempt) == 2:
+                kwargs['attr'] = attempt.pop()
+            result = self.get_elem_value(attempt[0], **kwargs)
+            if result:
+                return result
+        return None
+
+    @property
+    def ldjson(self):
+        """
+        All of the objects in the document's JSON-LD scripts.
+        """
+        if self._ldjson is None:
+            self._ldjson = []
+            for elem in self.find_all('script', type="application/ld+json"):
+                self._ldjson += parse_ldjson(elem.get_text())
+        return self._ldjson
+
+
+def parse_ldjson(text):
+    try:
+        datas = json.loads(text.strip())
+    except json.decoder.JSONDecodeError as err:
+        LOG.error(err)
+        return []
+    # if it's a dict, put it in a list, which most are
+    if isinstance(datas, dict):
+        return [datas]
+    # if it's not a list at this point, it's probably junk
+    return datas if isinstance(datas, list) else []
@@ -1,46 +1,75 @@
 import json
+import re
 from bs4 import BeautifulSoup
 from robostrippy.utils import absolute_url
 
 from readembedability.parsers.base import BaseParser
+from readembedability.parsers.document import make_document
 from readembedability.io import get_page
+from readembedability.utils import URL
 
 
 class OEmbedParser(BaseParser):
-    async def enrich(self, result):
+    READS = frozenset(['title'])
+    WRITES = frozenset(['authors', 'title', 'primary_image', 'embed',
+                        'content'])
+    PROVIDERS = []
+
+    @classmethod
+    def register(cls, regex, endpoint):
+        """
+        Pages with urls matching regex have their oembed at endpoint, so
+        there's no need to look for it in the page.
+        """
+        regex = re.compile(regex, re.IGNORECASE)
+        cls.PROVIDERS.append((regex, endpoint))
+
+    async def prefetch(self):
+        if provider_endpoint(self.url) is not None:
+            with self.timed('fetch', 'oembed'):
+                return await get_embed_from_provider(self.url)
         if self.soup is None:
-            return result
+            return None
+        with self.timed('fetch', 'oembed'):
+            return await get_embed_from_content(self.response, self.soup)
 
-        oembed = await get_embed_from_content(self.response)
+    async def enrich(self, result):
+        oembed = await self.prefetched()
         if oembed is None:
             return result
+        return apply_embed(result, oembed)
 
-        if 'author_name' in oembed:
-            result.set('authors', [oembed['author_name']], 3)
-
-        result.set_if('title', oembed.get('title'))
-        result.set_if('primary_image', oembed.get('thumbnail_url'))
-
-        # Don't trust oembed articles because they're probably crap, like
-        # NYTimes oembeded articles that are just iframes
-        isarticle = oembed.get('asset_type', '').lower() != 'article'
-        if 'html' in oembed and isarticle:
-            # if this is a wordpress embed, then let's not call it
-            # embedded and use the actual content
-            if "Embedded WordPress Post" not in oembed['html']:
-                result.set('embed', True)
-                # only lock if the html field actually contains html
-                lock = ">" in oembed['html'] and "<" in oembed['html']
-                conf = 3 if lock else 2
-                result.set('content', oembed['html'], conf)
-
-        elif 'url' in oembed and oembed['type'] == 'photo':
+
+def apply_embed(result, oembed):
+    """
+    Set everything an oembed (as a dict) says about a page on result.
+    """
+    if 'author_name' in oembed:
+        result.set('authors', [oembed['author_name']], 3)
+
+    result.set_if('title', oembed.get('title'))
+    result.set_if('primary_image', oembed.get('thumbnail_url'))
+
+    # Don't trust oembed articles because they're probably crap, like
+    # NYTimes oembeded articles that are just iframes
+    isarticle = oembed.get('asset_type', '').lower() != 'article'
+    if 'html' in oembed and isarticle:
+        # if this is a wordpress embed, then let's not call it
+        # embedded and use the actual content
+        if "Embedded WordPress Post" not in oembed['html']:
             result.set('embed', True)
-            result.set('content', "<img src='%s' />" % oembed['url'], 3)
-            result.set('title', oembed.get('title', result.get('title')))
-            result.set('primary_image', oembed['url'], 3)
+            # only lock if the html field actually contains html
+            lock = ">" in oembed['html'] and "<" in oembed['html']
+            conf = 3 if lock else 2
+            result.set('content', oembed['html'], conf)
 
-        return result
+    elif 'url' in oembed and oembed['type'] == 'photo':
+        result.set('embed', True)
+        result.set('content', "<img src='%s' />" % oembed['url'], 3)
+        result.set('title', oembed.get('title', result.get('title')))
+        result.set('primary_image', oembed['url'], 3)
+
+    return result
 
 
 def _parse_xml(xml):
@@ -65,13 +94,41 @@ def _parse_json(jsonstr):
         return None
 
 
-async def get_embed_from_content(response):
+def provider_endpoint(url):
+    """
+    The oembed url for the page at url if it's from a registered provider,
+    otherwise None.
+    """
+    url = str(url)
+    for regex, endpoint in OEmbedParser.PROVIDERS:
+        if regex.match(url) is not None:
+            return str(URL(endpoint).set_params(url=url, format='json'))
+    return None
+
+
+async def get_embed_from_provider(url):
+    """
+    Get the oembed for a page from a registered provider without fetching
+    the page itself.
+    """
+    endpoint = provider_endpoint(url)
+    if endpoint is None:
+        return None
+    page = await get_page(endpoint)
+    return _parse_json(page.body) if page else None
+
+
+async def get_embed_from_content(response, soup=None):
+    """
+    If soup (the document for response) isn't given, it'll be parsed.
+    """
     page = response.body
     if page is None or len(page) < 10:
         return None
-    soup = BeautifulSoup(page, "html.parser")
+    soup = make_document(page) if soup is None else soup
     types = ('application/json+oembed', 'text/xml+oembed')
-    link = soup.find('link', type=types, href=True)
+    links = soup.meta.find_all('link', type=types, href=True)
+    link = links[0] if links else None
     if link and link['type'] == 'application/json+oembed':
         parser = _parse_json
     elif link:
@@ -81,3 +138,21 @@ async def get_embed_from_content(response):
     url = absolute_url(response.url, link['href'])
     page = await get_page(url)
     return parser(page.body) if page else None
+
+
+OEmbedParser.register(r"https?://(www\.|m\.)?youtube\.com/(watch|shorts/)",
+                      "https://www.youtube.com/oembed")
+OEmbedParser.register(r"https?://youtu\.be/",
+                      "https://www.youtube.com/oembed")
+OEmbedParser.register(r"https?://(www\.|player\.)?vimeo\.com/",
+                      "https://vimeo.com/api/oembed.json")
+OEmbedParser.register(r"https?://(www\.|mobile\.)?twitter\.com/.+/status/",
+                      "https://publish.twitter.com/oembed")
+OEmbedParser.register(r"https?://(www\.)?flickr\.com/photos/",
+                      "https://www.flickr.com/services/oembed/")
+OEmbedParser.register(r"https?://flic\.kr/p/",
+                      "https://www.flickr.com/services/oembed/")
+OEmbedParser.register(r"https?://(www\.|m\.)?soundcloud\.com/",
+                      "https://soundcloud.com/oembed")
+OEmbedParser.register(r"https?://open\.spotify\.com/",
+                      "https://open.spotify.com/oembed")
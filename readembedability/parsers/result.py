@@ -1,6 +1,9 @@
+import copy
 from collections import defaultdict
 from datetime import datetime
 
+from readembedability.timing import Timings
+
 
 class ParseResult:
     def __init__(self, url):
@@ -10,6 +13,13 @@ class ParseResult:
         self.current_parser = None
         self.log = defaultdict(list)
 
+        # parsers can remember expensive work here for other parsers
+        # (see Summarizer.for_result) - it's never pickled or deep copied
+        self.memos = {}
+
+        # how long fetching, parsing, etc took (see readembedability.timing)
+        self.timings = Timings(url)
+
         self.set('url', str(url), 4)
         self.set('embed', False)
         self.set('primary_image', None)
@@ -28,6 +38,23 @@ class ParseResult:
     def set_parser_name(self, name):
         self.current_parser = name
 
+    def for_parser(self, name):
+        """
+        Return a view of this result for the named parser.  The view
+        shares all props and logs with this result but logs under its
+        own parser name, so parsers can run concurrently.
+        """
+        view = copy.copy(self)
+        view.current_parser = name
+        # copying goes through __getstate__, which leaves this out
+        view.memos = self.memos
+        return view
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['memos'] = {}
+        return state
+
     def set_if(self, prop, value, **kwargs):
         """
         Just like set, but only set 'if value'.  Lazy!
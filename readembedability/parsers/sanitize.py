@@ -0,0 +1,184 @@
+import hashlib
+from html import escape
+
+from lxml.html import defs, tostring
+
+from readembedability.cache import MemoryCache, MISSING
+from readembedability.utils import URL
+from readembedability.parsers.html import CLEAN_ELEMS, CLEAN_ELEM_ATTRS
+from readembedability.parsers.html import is_virtuous_text
+from readembedability.parsers.lxmlhtml import is_element, parse_html
+from readembedability.parsers.lxmlhtml import remove_elem
+
+# Elements that aren't HTML at all (like the <cnt> in washingtonexaminer
+# articles) are unwrapped rather than removed, keeping their contents.
+KNOWN_ELEMS = frozenset(defs.tags) | CLEAN_ELEMS
+# Elements that are kept even if sanitizing leaves them empty (the rest are
+# dropped, just like tidy did)
+KEEP_EMPTY = frozenset(defs.empty_tags) | frozenset(['iframe', 'object',
+                                                     'video', 'td', 'tr'])
+# Not str.strip's whitespace, which includes non-breaking spaces
+WHITESPACE = " \t\n\r\f"
+
+VERBOTTEN_CLASSES = ['caption', 'newsletter', 'signup']
+VERBOTTEN_ANCHOR_TEXT = ['sign up']
+VERBOTTEN_HREFS = ['mailto:', 'javascript:', 'twitter.com/share',
+                   'facebook.com/sharer/sharer.php']
+
+# Sanitized html, shared by every request in this process, since the same
+# articles show up under lots of urls.  This can be replaced with any
+# cache (like a readembedability.cache.DiskCache), or None.
+SANITIZE_CACHE = MemoryCache(maxsize=256)
+
+
+def content_key(html):
+    """
+    A key for html (str or bytes) that's the same for the same content.
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8', 'surrogatepass')
+    return hashlib.sha1(html).hexdigest()
+
+
+class Sanitizer:
+    """
+    sanitize_html, remembering results by a hash of the html: first in a
+    small cache of its own (there's one Sanitizer per request) and then in
+    SANITIZE_CACHE.  If given a Timings, every call that isn't cached is
+    timed.
+    """
+    def __init__(self, maxsize=64, timings=None):
+        self.local = MemoryCache(maxsize)
+        self.timings = timings
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, html):
+        key = content_key(html)
+        shared = SANITIZE_CACHE
+        clean = self.local.get(key, MISSING)
+        if clean is MISSING and shared is not None:
+            clean = shared.get(key, MISSING)
+            if clean is not MISSING:
+                self.local.set(key, clean)
+
+        if clean is not MISSING:
+            self.hits += 1
+            return clean
+
+        self.misses += 1
+        if self.timings is None:
+            clean = sanitize_html(html)
+        else:
+            with self.timings.time('sanitize', 'sanitize_html'):
+                clean = sanitize_html(html)
+        self.local.set(key, clean)
+        if shared is not None:
+            shared.set(key, clean)
+        return clean
+
+
+def sanitize_html(html):
+    """
+    Strip html down to the useful content in its body: only elements in
+    CLEAN_ELEMS (with only the attributes in CLEAN_ELEM_ATTRS) and text
+    that is_virtuous_text are kept, and anything that leaves empty is
+    dropped.  This is done with a single parse into an lxml tree, and the
+    result is always well formed.
+    """
+    if isinstance(html, bytes):
+        # just like tidy, assume utf-8
+        html = html.decode('utf-8', 'replace')
+    root = parse_html(html)
+    body = None if root is None else root.find('body')
+    if body is None:
+        return ""
+
+    stack = [body]
+    while stack:
+        elem = stack.pop()
+        unwrap_unknown(elem)
+        if elem.text and not is_virtuous_text(elem.text):
+            elem.text = None
+        for child in list(elem):
+            # the text after child is a text node of elem's
+            if child.tail and not is_virtuous_text(child.tail):
+                child.tail = None
+            if is_element(child) and is_virtuous_elem(child):
+                allowed = CLEAN_ELEM_ATTRS.get(child.tag, frozenset())
+                for name in child.attrib.keys():
+                    if name not in allowed:
+                        del child.attrib[name]
+                stack.append(child)
+            else:
+                if child.tag == 'br':
+                    # keep the words on either side apart, like tidy did
+                    child.tail = "\n" + (child.tail or "")
+                remove_elem(child)
+
+    # children come before their parents, so a parent that's left empty
+    # once they're gone is dropped too
+    for elem in reversed(list(body.iterdescendants())):
+        if is_empty(elem):
+            remove_elem(elem)
+
+    parts = [escape(body.text or "", quote=False)]
+    parts += [tostring(child, encoding='unicode') for child in body]
+    return "".join(parts)
+
+
+def unwrap_unknown(elem):
+    index = 0
+    while index < len(elem):
+        child = elem[index]
+        if is_element(child) and child.tag not in KNOWN_ELEMS:
+            # its children (if any) now start at index
+            child.drop_tag()
+        else:
+            index += 1
+
+
+def is_empty(elem):
+    """
+    Is elem nothing but whitespace (and <br>s)?  Elements in KEEP_EMPTY
+    never are.
+    """
+    if elem.tag in KEEP_EMPTY:
+        return False
+    if elem.text and elem.text.strip(WHITESPACE):
+        return False
+    for child in elem:
+        if child.tag != 'br':
+            return False
+        if child.tail and child.tail.strip(WHITESPACE):
+            return False
+    return True
+
+
+def is_virtuous_elem(elem):
+    """
+    Is this element useful?  Does it likely contain good information?
+    """
+    if elem.tag == 'a':
+        result = is_virtuous_anchor(elem)
+    elif elem.tag == 'img':
+        src = elem.get('src')
+        result = bool(src) and 'data:image' not in src
+    elif elem.tag == 'iframe':
+        src = elem.get('src')
+        result = bool(src) and URL(src).top_host in ['youtube.com']
+    else:
+        result = elem.tag in CLEAN_ELEMS
+
+    cstring = elem.get('class', '')
+    return result and not any(verb in cstring for verb in VERBOTTEN_CLASSES)
+
+
+def is_virtuous_anchor(elem):
+    text = elem.text_content().lower().strip()
+    href = elem.get('href')
+    if not href or href.strip() == '#' or not is_virtuous_text(text):
+        return False
+    if any(verb in text for verb in VERBOTTEN_ANCHOR_TEXT):
+        return False
+    return not any(verb in href for verb in VERBOTTEN_HREFS)
@@ -0,0 +1,71 @@
+import asyncio
+
+# Every parser implicitly reads this, since nothing runs after a parser
+# sets it to False.
+SUCCESS = frozenset(['success'])
+
+
+def conflicts(first, second):
+    """
+    Does the parser class second need to wait for the (earlier) parser
+    class first?  It does if either writes a property the other reads or
+    writes.  Parsers that don't declare READS / WRITES conflict with
+    everything.
+    """
+    declared = [first.READS, first.WRITES, second.READS, second.WRITES]
+    if any(props is None for props in declared):
+        return True
+    freads = SUCCESS | first.READS
+    sreads = SUCCESS | second.READS
+    if first.WRITES & (sreads | second.WRITES):
+        return True
+    return bool(freads & second.WRITES)
+
+
+class ParserScheduler:
+    """
+    Run a list of parser classes over a response in a way that gives the
+    same result as running them one after another, but lets any parser
+    start as soon as the parsers that it conflicts with (see conflicts)
+    are finished.  Network I/O in each parser's prefetch is started for
+    all parsers up front.
+    """
+    def __init__(self, parser_classes):
+        self.parser_classes = list(parser_classes)
+        self.dependencies = []
+        for index, pclass in enumerate(self.parser_classes):
+            earlier = self.parser_classes[:index]
+            deps = [i for i, e in enumerate(earlier) if conflicts(e, pclass)]
+            self.dependencies.append(deps)
+
+    async def run(self, response, context, result):
+        parsers = [p(response, context) for p in self.parser_classes]
+        prefetches = [parser.prefetched() for parser in parsers]
+        tasks = []
+        for parser, deps in zip(parsers, self.dependencies):
+            deps = [tasks[index] for index in deps]
+            coro = ParserScheduler._enrich(parser, deps, result)
+            tasks.append(asyncio.ensure_future(coro))
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for future in tasks + prefetches:
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled():
+                    # prefetches of skipped parsers are never awaited
+                    future.exception()
+        return result
+
+    @classmethod
+    async def _enrich(cls, parser, deps, result):
+        if deps:
+            await asyncio.wait(deps)
+        # allow short circuiting
+        failed = any(d.cancelled() or d.exception() for d in deps)
+        if failed or not result.get('success'):
+            return
+        name = type(parser).__name__
+        with result.timings.time('parser', name):
+            await parser.enrich(result.for_parser(name))
@@ -0,0 +1,135 @@
+import asyncio
+import gc
+import unittest
+from unittest import mock
+
+from fastimage import detect
+
+from readembedability.cache import MemoryCache
+from readembedability.parsers.assets import LastDitchMedia, ImagesParser
+from readembedability.parsers.assets import ImageProber
+from readembedability.parsers.base import ParseContext
+from readembedability.parsers.result import ParseResult
+from readembedability.tests.utils import FakeResponse, async_test
+from readembedability.tests.soupkitchen import T
+
+
+class LastDitchMediaTest(unittest.TestCase):
+    @async_test
+    async def test_shared_document_untouched(self):
+        iframe = T.iframe(src="https://www.youtube.com/embed/x")
+        html = T.html(T.body(T.p("some content"), T.img(src="a.jpg"),
+                             iframe))
+        response = FakeResponse(str(html))
+        context = ParseContext(response)
+        result = ParseResult("")
+        result.set('content', "<p>some content</p>")
+        result.set('primary_image', "a.jpg")
+
+        parser = LastDitchMedia(response, context)
+        await parser.enrich(result)
+        self.assertTrue(result.get('content').startswith("<iframe"))
+        # the shared document is neither copied nor changed
+        self.assertIs(parser.soup, context.soup)
+        self.assertEqual(len(context.soup.find_all('img')), 1)
+
+
+class ImagesParserTest(unittest.TestCase):
+    @async_test
+    async def test_size_cache(self):
+        calls = []
+
+        async def get_size(url):
+            calls.append(url)
+            if 'missing' in url:
+                raise detect.DownloadError()
+            return (800, 600)
+
+        parser = ImagesParser(FakeResponse("<html></html>"))
+        with mock.patch.object(ImagesParser, 'SIZE_CACHE', MemoryCache()):
+            with mock.patch.object(detect, 'get_size', get_size):
+                for _ in range(2):
+                    size = await parser.get_image_size("http://a.com/a.jpg")
+                    self.assertEqual(size, ("http://a.com/a.jpg", (800, 600)))
+                    size = await parser.get_image_size("http://missing.jpg")
+                    self.assertEqual(size, ("http://missing.jpg", None))
+        self.assertEqual(calls, ["http://a.com/a.jpg", "http://missing.jpg"])
+
+
+class ImageProberTest(unittest.TestCase):
+    def setUp(self):
+        self.active = 0
+        self.most_active = 0
+
+    async def get_size(self, url):
+        self.active += 1
+        self.most_active = max(self.active, self.most_active)
+        await asyncio.sleep(1 if 'slow' in url else 0.01)
+        self.active -= 1
+        return (url, (int(url.split('/')[-1]), 500))
+
+    @async_test
+    async def test_concurrency(self):
+        prober = ImageProber(self.get_size, concurrency=3)
+        urls = ["http://a.com/%i" % i for i in range(10)]
+        sizes = await prober.probe(urls)
+        self.assertEqual(len(sizes), 10)
+        self.assertEqual(self.most_active, 3)
+
+    @async_test
+    async def test_deadline(self):
+        prober = ImageProber(self.get_size, deadline=0.1)
+        sizes = await prober.probe(["http://slow.com/1", "http://a.com/2"])
+        self.assertEqual(list(sizes.keys()), ["http://a.com/2"])
+        self.assertTrue(prober.stopped)
+        # nothing else gets measured once time is up
+        await prober.probe(["http://a.com/3"])
+        self.assertNotIn("http://a.com/3", prober.sizes)
+
+    @async_test
+    async def test_enough(self):
+        def is_enough(sizes):
+            return "http://a.com/1" in sizes
+        prober = ImageProber(self.get_size, concurrency=1,
+                             is_enough=is_enough)
+        urls = ["http://a.com/%i" % i for i in range(10)]
+        sizes = await prober.probe(urls)
+        self.assertEqual(len(sizes), 2)
+
+    @async_test
+    async def test_errors_retrieved(self):
+        async def get_size(url):
+            await asyncio.sleep(0.01)
+            raise ValueError(url)
+
+        errors = []
+        loop = asyncio.get_event_loop()
+        loop.set_exception_handler(lambda _, context: errors.append(context))
+        prober = ImageProber(get_size, concurrency=2)
+        with self.assertRaises(ValueError):
+            await prober.probe(["http://a.com/1", "http://a.com/2"])
+        gc.collect()
+        self.assertEqual(errors, [])
+
+    @async_test
+    async def test_large_social_image(self):
+        imgs = [T.img(src="/%i" % i) for i in range(7)]
+        html = T.html(T.head(T.meta(property="og:image", content="/big")),
+                      T.body(T.img(src="/small"), *imgs))
+        parser = ImagesParser(FakeResponse(str(html), "http://a.com/"))
+        sizes = {"http://a.com/big": (1200, 630),
+                 "http://a.com/small": (500, 300)}
+
+        async def get_size(url):
+            await asyncio.sleep(0)
+            return (url, sizes.get(url, (800, 600)))
+        parser.prober.get_size = get_size
+        parser.prober.concurrency = 1
+
+        result = await parser.enrich(ParseResult(""))
+        self.assertEqual(result.get('primary_image'), "http://a.com/big")
+        # enough large images were measured to fill the secondaries, and
+        # then probing stopped
+        secondaries = ["http://a.com/%i" % i for i in range(4)]
+        self.assertEqual(sorted(result.get('secondary_images')), secondaries)
+        self.assertEqual(len(parser.prober.sizes), 6)
@@ -0,0 +1,159 @@
+import re
+import unittest
+
+from readembedability.parsers.document import make_document
+from readembedability.parsers.html import SmartHTMLDocument
+from readembedability.parsers.lxmlhtml import LxmlHTMLDocument
+from readembedability.tests.soupkitchen import T
+
+PAGES = [
+    T.html(T.head(T.title("A title")),
+           T.body(T.p("one ", T.b("two"), " three"), T.p("four"))),
+    T.html(
+        T.head(
+            T.title("Meta"),
+            T.meta(property="og:title", content="An OG Title"),
+            T.meta(name="author", content=" Sally Smith "),
+            T.meta(name="twitter:image:src", content="/img.png"),
+            T.link(rel="amphtml author", href="/amp")
+        ),
+        T.body(
+            T.div(
+                T.span("By Bob Jones", itemprop="author"),
+                T.div(T.p("Body text here."), itemprop="articleBody text"),
+                {'class': "main story", 'id': "content"}
+            ),
+            T.div(T.img(src="/a.jpg"), id="sidebar"),
+            T.a("Author page", href="/bob", rel="author")
+        )
+    ),
+    "<html><body>\n<p>Advertisement</p><!-- a comment --> tail "
+    "<script>var x = 1;</script><style>p {}</style>"
+    "<noscript>no js</noscript> <b>bold</b>\n</body></html>",
+    "<html><body><div>Read more here <i>please</i></div>"
+    "<table><tr><td headers='a b'>cell</td></tr></table></body></html>"
+]
+
+SEARCHES = [
+    (('meta',), {}),
+    (('meta',), {'content': True}),
+    (('meta',), {'property': 'og:title', 'content': True}),
+    (('link',), {'rel': 'amphtml'}),
+    (('a',), {'rel': 'author'}),
+    ((None,), {'itemprop': 'author'}),
+    ((), {'itemprop': 'articleBody'}),
+    (('div',), {'class': 'story'}),
+    (('div',), {'class': 'main story'}),
+    (('td',), {'headers': 'b'}),
+    ((['p', 'b'],), {}),
+    ((), {'id': ['sidebar', 'content']}),
+    ((re.compile('^t'),), {}),
+    (('link',), {'rel': 'amphtml author', 'href': True}),
+    ((), {'rel': True}),
+    (('p',), {'itemprop': None}),
+    (('meta',), {'name': ['author', 'nope']}),
+    (('t',), {})
+]
+
+LOOSE_SEARCHES = [
+    ((), {'itemprop': 'articleBody'}),
+    (('meta',), {'name': 'twitter:image'})
+]
+
+ATTEMPTS = [
+    ('meta', 'content', {'name': 'author'}),
+    (None, None, {'itemprop': 'author'}),
+    ('a', None, {'rel': 'author'}),
+    ('meta', 'content', {'property': 'nope'})
+]
+
+
+def describe(elems):
+    return [(e.name, sorted(e.attrs.items()), e.get_text()) for e in elems]
+
+
+class LxmlParityTest(unittest.TestCase):
+    """
+    Make sure the lxml backend agrees with the BeautifulSoup one.
+    """
+    def compare(self, func):
+        for page in PAGES:
+            bsdoc = SmartHTMLDocument(str(page))
+            lxdoc = LxmlHTMLDocument(str(page))
+            self.assertEqual(func(bsdoc), func(lxdoc), msg=str(page))
+
+    def test_text(self):
+        self.compare(lambda doc: doc.all_text())
+        self.compare(lambda doc: doc.text_chunks())
+        self.compare(lambda doc: [str(t) for t in doc.get_text_nodes()])
+
+    def test_text_chunks(self):
+        html = "<html><body><p>one <b>two</b></p></body></html>"
+        for doc in [SmartHTMLDocument(html), LxmlHTMLDocument(html)]:
+            self.assertEqual(doc.text_chunks(),
+                             ['one  two', 'one  two', 'one ', 'two', 'two'])
+
+    def test_title(self):
+        self.compare(lambda doc: doc.title and doc.title.string)
+
+    def test_find_all(self):
+        for args, kwargs in SEARCHES:
+            self.compare(lambda doc: describe(doc.find_all(*args, **kwargs)))
+        for args, kwargs in LOOSE_SEARCHES:
+            self.compare(
+                lambda doc: describe(doc.find_all_loose(*args, **kwargs)))
+
+    def test_meta_index(self):
+        for page in PAGES:
+            for doc in [SmartHTMLDocument(str(page)),
+                        LxmlHTMLDocument(str(page))]:
+                for args, kwargs in SEARCHES:
+                    found = doc.meta.find_all(*args, **kwargs)
+                    expected = doc.find_all(*args, **kwargs)
+                    self.assertEqual(describe(found), describe(expected))
+                for args, kwargs in LOOSE_SEARCHES:
+                    found = doc.meta.find_all_loose(*args, **kwargs)
+                    expected = doc.find_all_loose(*args, **kwargs)
+                    self.assertEqual(describe(found), describe(expected))
+
+    def test_find_parents(self):
+        def parents(doc):
+            return [describe(img.find_parents(id='sidebar', limit=1))
+                    for img in doc.find_all('img', src=True)]
+        self.compare(parents)
+
+    def test_elem_values(self):
+        for attempt in ATTEMPTS:
+            self.compare(lambda doc: doc.get_elem_value(
+                attempt[0], attr=attempt[1], **attempt[2]))
+        self.compare(lambda doc: doc.coalesce_elem_value(ATTEMPTS))
+        self.compare(lambda doc: doc.coalesce_elem_value(ATTEMPTS[1:]))
+
+    # lxml merges the text on either side of a deleted element into one
+    # text node where bs4 keeps two, so only compare the words after
+    # a delete.
+    def test_delete(self):
+        def delete(doc):
+            # the cached text has to be thrown away
+            doc.text_chunks()
+            doc.delete('b')
+            return doc.all_text().split(), doc.text_chunks()[0].split()
+        self.compare(delete)
+
+    def test_copy(self):
+        def copy(doc):
+            clone = doc.copy()
+            clone.delete('b')
+            return (doc.all_text(), clone.all_text().split())
+        self.compare(copy)
+
+    def test_node_text(self):
+        def parent_text(doc):
+            return [doc.node_text(t.parent) for t in doc.get_text_nodes()]
+        self.compare(parent_text)
+
+    def test_make_document(self):
+        html = str(PAGES[0])
+        self.assertIsInstance(make_document(html, 'lxml'), LxmlHTMLDocument)
+        self.assertIsInstance(make_document(html, 'bs4'), SmartHTMLDocument)
+        self.assertRaises(ValueError, make_document, html, 'nope')
@@ -1,6 +1,6 @@
 import unittest
 
-from readembedability.parsers.meta import AuthorParser
+from readembedability.parsers.meta import AuthorParser, LDJSONParser
 from readembedability.parsers.result import ParseResult
 from readembedability.tests.utils import FakeResponse, async_test
 from readembedability.tests.soupkitchen import T
@@ -14,3 +14,16 @@ class AuthorParserTest(unittest.TestCase):
         aparser = AuthorParser(FakeResponse(str(html)))
         result = await aparser.enrich(ParseResult(""))
         self.assertEqual(result.get('authors'), ["Snake Plissken"])
+
+
+class LDJSONParserTest(unittest.TestCase):
+    @async_test
+    async def test_news_article(self):
+        data = '{"@type": "NewsArticle", "headline": "A Headline"}'
+        html = ("<html><head><script type='application/ld+json'>%s</script>"
+                "<script type='application/ld+json'>{nope</script></head>"
+                "<body></body></html>" % data)
+        parser = LDJSONParser(FakeResponse(html))
+        self.assertEqual(len(parser.soup.meta.ldjson), 1)
+        result = await parser.enrich(ParseResult(""))
+        self.assertEqual(result.get('title'), "A Headline")
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from readembedability.parsers import oembed
+from readembedability.parsers.oembed import OEmbedParser, provider_endpoint
+from readembedability.parsers.result import ParseResult
+from readembedability.tests.utils import FakeResponse, async_test
+
+
+class FakePage:
+    def __init__(self, body):
+        self.body = body
+
+
+class OEmbedParserTest(unittest.TestCase):
+    def test_provider_endpoint(self):
+        url = "https://www.youtube.com/watch?v=abc"
+        expected = ("https://www.youtube.com/oembed?url=https%3A%2F%2F"
+                    "www.youtube.com%2Fwatch%3Fv%3Dabc&format=json")
+        self.assertEqual(provider_endpoint(url), expected)
+        self.assertIsNone(provider_endpoint("https://example.com/watch"))
+
+    @async_test
+    async def test_provider_fast_path(self):
+        body = '{"type": "video", "html": "<iframe></iframe>", "title": "T"}'
+        get_page = mock.Mock(side_effect=self.fake_get_page(body))
+        url = "https://vimeo.com/123"
+        # the page isn't even html, but the provider has an embed
+        response = FakeResponse("not html", url=url)
+        with mock.patch.object(oembed, 'get_page', get_page):
+            parser = OEmbedParser(response)
+            result = await parser.enrich(ParseResult(url))
+
+        endpoint = get_page.call_args[0][0]
+        self.assertTrue(endpoint.startswith("https://vimeo.com/api/"))
+        self.assertTrue(result.get('embed'))
+        self.assertEqual(result.get('content'), "<iframe></iframe>")
+
+    @async_test
+    async def test_link_in_page(self):
+        body = '{"type": "rich", "html": "<div></div>"}'
+        get_page = mock.Mock(side_effect=self.fake_get_page(body))
+        link = ("<link type='application/json+oembed' "
+                "href='/oembed?u=1'>")
+        html = "<html><head>%s</head><body></body></html>" % link
+        response = FakeResponse(html, url="http://example.com/a")
+        with mock.patch.object(oembed, 'get_page', get_page):
+            parser = OEmbedParser(response)
+            result = await parser.enrich(ParseResult(response.url))
+
+        get_page.assert_called_once_with("http://example.com/oembed?u=1")
+        self.assertEqual(result.get('content'), "<div></div>")
+
+    # pylint: disable=no-self-use
+    def fake_get_page(self, body):
+        async def get_page(url):  # pylint: disable=unused-argument
+            return FakePage(body)
+        return get_page
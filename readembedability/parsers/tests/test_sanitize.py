@@ -0,0 +1,152 @@
+import re
+import unittest
+from unittest import mock
+
+from bs4 import BeautifulSoup
+from lxml.html import fragment_fromstring
+
+from readembedability.cache import MemoryCache
+from readembedability.parsers import sanitize
+from readembedability.parsers.html import SmartElem
+from readembedability.parsers.lxmlhtml import descendants, is_element
+from readembedability.parsers.sanitize import sanitize_html, Sanitizer
+
+# only needed to compare against the old sanitizer
+try:
+    import tidylib
+except ImportError:
+    tidylib = None  # pylint: disable=invalid-name
+
+# Pages, and what the old tidy based sanitizer (legacy_sanitize_html)
+# gave for them
+PAGES = [
+    ("<html><body><p class='story' id='a'>Hello <b>there</b></p></body>"
+     "</html>",
+     '<p>Hello <b>there</b></p>'),
+    ("<p>Advertisement</p><p>Photo by someone</p><p>Real text.</p>",
+     '<p>Real text.</p>'),
+    ("<div><cnt>unknown <em>tags</em> are</cnt> unwrapped</div>",
+     '<div>unknown <em>tags</em> are unwrapped</div>'),
+    ("<div>text<script>alert(1)</script><style>p {}</style> more</div>",
+     '<div>text more</div>'),
+    ("<p>one<!-- a comment -->two<br>three<u>gone</u> four</p>",
+     '<p>onetwo three four</p>'),
+    ("<a href='/ok'>A link</a> <a href='#'>hash</a> <a>no href</a>"
+     "<a href='mailto:me@example.com'>mail</a> <a href='/s'>Sign up now</a>"
+     "<a href='https://twitter.com/share?u=x'>Share</a>",
+     '<a href="/ok">A link</a>'),
+    ("<img src='/a.jpg' width='10'><img src='data:image/png;base64,x'>"
+     "<img><iframe src='https://www.youtube.com/embed/x'></iframe>"
+     "<iframe src='https://example.com/ad'></iframe>",
+     '<img src="/a.jpg" alt=""><iframe src="https://www.youtube.com/embed/x">'
+     '</iframe>'),
+    ("<div class='newsletter signup'>Sign up!</div><div class='x'>ok</div>",
+     '<div>ok</div>'),
+    ("<table><tr><td>cell</td></tr></table><ul><li>item</li></ul>",
+     '<table>\n<tr>\n<td>cell</td>\n</tr>\n</table>\n<ul>\n<li>item</li>\n'
+     '</ul>'),
+    ("<html><head><title>Only a head</title></head></html>", ''),
+    ("<p>café &amp; crème &lt;3</p>", '<p>café & crème &lt;3</p>'),
+    ("", ''),
+    ("<p> </p><div><p></p></div><h2>  </h2><p><br></p><p>kept</p>",
+     '<p>kept</p>'),
+    ("<ul><li></li><li>b</li></ul><div>a<b></b>c</div>",
+     '<ul>\n<li>b</li>\n</ul>\n<div>ac</div>'),
+    ("<table><tr><td></td><td>a</td></tr></table><p>&nbsp;</p>",
+     '<table>\n<tr>\n<td></td>\n<td>a</td>\n</tr>\n</table>\n'
+     '<p>&nbsp;</p>')
+]
+
+
+def legacy_sanitize_html(html):
+    """
+    The sanitize_html this replaced: a tidy round trip, a bs4 pass using
+    SmartElem, and then tidy again.
+    """
+    html, _ = tidylib.tidy_fragment(html, options={'indent': 0})
+    soup = BeautifulSoup(html, 'lxml')
+    if not soup.html or not soup.html.body:
+        return ""
+
+    for elem in list(soup.html.body.descendants):
+        smart = SmartElem(elem)
+        if not smart.is_virtuous():
+            smart.delete()
+        else:
+            smart.clean()
+
+    html = "".join([str(c) for c in soup.html.body.children])
+    html, _ = tidylib.tidy_fragment(html, options={'indent': 0})
+    return html
+
+
+def outline(html):
+    """
+    The elements, attributes and words in html, ignoring the whitespace
+    and alt attributes tidy adds.
+    """
+    parts = []
+    for node in descendants(fragment_fromstring(html, create_parent=True)):
+        if not isinstance(node, str) and is_element(node):
+            attrs = sorted(i for i in node.attrib.items() if i[0] != 'alt')
+            parts.append((node.tag, attrs))
+        elif isinstance(node, str):
+            parts += re.findall(r'\S+', node)
+    return parts
+
+
+def has_libtidy():
+    if tidylib is None:
+        return False
+    try:
+        tidylib.tidy_fragment("")
+        return True
+    except OSError:
+        return False
+
+
+class SanitizeTest(unittest.TestCase):
+    def test_sanitize(self):
+        html = ("<div class='story'><cnt>Hello</cnt> <u>gone</u>"
+                "<a href='/x' rel='me'>link</a><!-- c --></div>")
+        expected = '<div>Hello <a href="/x">link</a></div>'
+        self.assertEqual(sanitize_html(html), expected)
+        self.assertEqual(sanitize_html(html.encode('utf-8')), expected)
+
+    def test_empty(self):
+        self.assertEqual(sanitize_html(""), "")
+        self.assertEqual(sanitize_html("<html><head></head></html>"), "")
+
+    def test_matches_legacy(self):
+        for html, legacy in PAGES:
+            current = sanitize_html(html)
+            if not legacy.strip():
+                self.assertEqual(current, "")
+            else:
+                self.assertEqual(outline(current), outline(legacy), html)
+
+    @unittest.skipUnless(has_libtidy(), "libtidy isn't installed")
+    def test_legacy_outputs(self):
+        for html, legacy in PAGES:
+            self.assertEqual(outline(legacy_sanitize_html(html)),
+                             outline(legacy), html)
+
+
+class SanitizerTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(sanitize, 'SANITIZE_CACHE', MemoryCache())
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_memoized(self):
+        html = "<p>Some <u>text</u></p>"
+        first = Sanitizer()
+        self.assertEqual(first(html), "<p>Some </p>")
+        self.assertEqual(first(html.encode('utf-8')), "<p>Some </p>")
+        self.assertEqual((first.hits, first.misses), (1, 1))
+
+        # another request gets it from the shared cache
+        second = Sanitizer()
+        self.assertEqual(second(html), "<p>Some </p>")
+        self.assertEqual((second.hits, second.misses), (1, 0))
+        self.assertEqual(sanitize.SANITIZE_CACHE.hits, 1)
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+from readembedability.parsers.base import BaseParser
+from readembedability.parsers.result import ParseResult
+from readembedability.parsers.schedule import ParserScheduler, conflicts
+from readembedability.tests.utils import FakeResponse, async_test
+
+EVENTS = []
+
+
+def make_parser(name, reads, writes, value=None, delay=0):
+    async def prefetch(self):
+        EVENTS.append(('prefetch', name))
+        await asyncio.sleep(delay)
+        return value
+
+    async def enrich(self, result):
+        EVENTS.append(('start', name))
+        fetched = await self.prefetched()
+        for prop in writes:
+            result.set(prop, fetched or name)
+        EVENTS.append(('end', name))
+        return result
+
+    attrs = {'READS': reads, 'WRITES': writes, 'prefetch': prefetch,
+             'enrich': enrich}
+    return type(name, (BaseParser,), attrs)
+
+
+class ParserSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        del EVENTS[:]
+
+    def test_conflicts(self):
+        first = make_parser('First', frozenset(), frozenset(['title']))
+        reader = make_parser('Reader', frozenset(['title']), frozenset())
+        other = make_parser('Other', frozenset(), frozenset(['summary']))
+        unknown = make_parser('Unknown', None, None)
+        self.assertTrue(conflicts(first, reader))
+        self.assertTrue(conflicts(reader, first))
+        self.assertTrue(conflicts(first, first))
+        self.assertFalse(conflicts(first, other))
+        self.assertTrue(conflicts(other, unknown))
+        success = make_parser('Success', frozenset(), frozenset(['success']))
+        self.assertTrue(conflicts(success, other))
+
+    @async_test
+    async def test_run(self):
+        slow = make_parser('Slow', frozenset(), frozenset(['title']),
+                           'slow title', 0.05)
+        fast = make_parser('Fast', frozenset(), frozenset(['summary']))
+        after = make_parser('After', frozenset(), frozenset(['title']))
+        result = ParseResult("")
+        result.set('success', True)
+        scheduler = ParserScheduler([slow, fast, after])
+        result = await scheduler.run(FakeResponse(""), None, result)
+
+        # all prefetches start before anything is enriched
+        self.assertEqual(EVENTS[:3], [('prefetch', n) for n in
+                                      ['Slow', 'Fast', 'After']])
+        # Fast didn't need to wait on Slow, but After did
+        self.assertLess(EVENTS.index(('end', 'Fast')),
+                        EVENTS.index(('end', 'Slow')))
+        self.assertLess(EVENTS.index(('end', 'Slow')),
+                        EVENTS.index(('start', 'After')))
+        self.assertEqual(result.get('title'), 'After')
+        self.assertEqual(result.get('summary'), 'Fast')
+        logged = [entry[0] for entry in result.log['title']]
+        self.assertEqual(logged, ['Slow', 'After'])
+
+    @async_test
+    async def test_short_circuit(self):
+        stop = make_parser('Stop', None, None)
+        later = make_parser('Later', frozenset(), frozenset(['title']))
+
+        async def enrich(self, result):
+            return result.set('success', False)
+        stop.enrich = enrich
+
+        result = ParseResult("")
+        result.set('success', True)
+        scheduler = ParserScheduler([stop, later])
+        result = await scheduler.run(FakeResponse(""), None, result)
+        self.assertFalse(result.get('success'))
+        self.assertIsNone(result.get('title'))
+        self.assertNotIn(('start', 'Later'), EVENTS)
@@ -1,6 +1,10 @@
+import copy
+import heapq
 import unittest
 
 from readembedability.parsers.text import parse_authors, fix_name
+from readembedability.parsers.text import Summarizer
+from readembedability.parsers.result import ParseResult
 
 
 class TextTest(unittest.TestCase):
@@ -17,3 +21,59 @@ class TextTest(unittest.TestCase):
         ]
         for comp in comparisons:
             self.assertEqual(parse_authors(comp[0]), comp[1])
+
+
+class SummarizerTest(unittest.TestCase):
+    TEXT = ("Today Chief Justice Roberts spoke to the court. The court heard "
+            "the case about the river. Later Chief Justice Roberts left the "
+            "court for the day. The river case will be heard again soon.")
+
+    def test_common_cap(self):
+        sumzer = Summarizer(self.TEXT, "River case")
+        self.assertEqual(sumzer.common_cap("roberts"), "Roberts")
+        self.assertEqual(sumzer.common_cap("court"), "court")
+        # phrases and unseen words still work
+        self.assertEqual(sumzer.common_cap("justice roberts"),
+                         "Justice Roberts")
+        self.assertEqual(sumzer.common_cap("nowhere"), "nowhere")
+
+    def test_entities(self):
+        sumzer = Summarizer(self.TEXT, "River case")
+        self.assertEqual(sumzer.get_entity("Roberts"),
+                         "Chief Justice Roberts")
+        self.assertIn("Chief Justice Roberts", sumzer.keywords(10))
+
+    def test_keywords(self):
+        # "art" shows up more often in "start" and "party" than as "Art",
+        # so it's a word of its own rather than part of "Art Basel"
+        text = ("Art Basel opens in Miami this week. Collectors start "
+                "arriving before the start of Art Basel, and the party "
+                "starts early. Dealers say sales will start strong at Art "
+                "Basel, and every party is a start to the season.")
+        sumzer = Summarizer(text, "Miami party season")
+        self.assertEqual(sumzer.common_cap("art"), "art")
+        self.assertEqual(sumzer.keywords(),
+                         ['start', 'party', 'art', 'Basel', 'Miami'])
+        self.assertEqual(sumzer.slug(), "miami-party-season-start-party")
+
+    def test_summary(self):
+        # every sentence has one more word than the last, so with the
+        # penalty for position they all score the same
+        extra = "echo foxtrot golf hotel india juliet kilo lima mike".split()
+        text = " ".join("Alpha bravo charlie delta %s." % " ".join(extra[:i])
+                        for i in range(10))
+        sumzer = Summarizer(text, "Title")
+        top = heapq.nlargest(3, sumzer.sentences)
+        expected = " ".join(s[1] for s in sorted(top, key=lambda s: s[2]))
+        self.assertEqual(sumzer.summary(3), expected)
+        self.assertEqual(len(sumzer.sentences), 10)
+
+    def test_for_result(self):
+        result = ParseResult("http://example.com")
+        result.set('_text', self.TEXT)
+        result.set('title', "River case")
+        first = Summarizer.for_result(result.for_parser("One"))
+        self.assertIs(Summarizer.for_result(result.for_parser("Two")), first)
+        result.set('_text', self.TEXT + " The end of the river case.")
+        self.assertIsNot(Summarizer.for_result(result), first)
+        self.assertEqual(copy.deepcopy(result).memos, {})
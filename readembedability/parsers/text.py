@@ -1,32 +1,60 @@
-from collections import Counter
+from collections import Counter, defaultdict
 from collections import deque
+from functools import lru_cache
 from operator import itemgetter, methodcaller
 import heapq
 import re
-from pkg_resources import resource_string, resource_filename
-
-from nltk.tokenize.regexp import RegexpTokenizer
-import nltk
 
+from readembedability.lazy import LazyModule
 from readembedability.utils import most_common, unique, longest_unique
 from readembedability.parsers.base import BaseParser
 
-# These are taken from MySQL (NLTK's stopwords were a joke):
-# http://dev.mysql.com/tech-resources/articles/full-text-revealed.html
-_RSTRING = resource_string('readembedability', 'data/stopwords.txt')
-STOPWORDS = str(_RSTRING, 'utf-8').strip().split("\n")
-_RFNAME = resource_filename('readembedability', 'data/english.pickle')
-PUNKT = nltk.data.load(_RFNAME)
+nltk = LazyModule('nltk.data')  # pylint: disable=invalid-name
+numpy = LazyModule('numpy')  # pylint: disable=invalid-name
+pkg_resources = LazyModule('pkg_resources')  # pylint: disable=invalid-name
+
+# Sentences are scored by how many of this many top words they have
+SCORING_WORDS = 100
 
 
-class WordPunctTokenizer(RegexpTokenizer):
+@lru_cache(maxsize=None)
+def load_stopwords():
+    """
+    These are taken from MySQL (NLTK's stopwords were a joke):
+    http://dev.mysql.com/tech-resources/articles/full-text-revealed.html
+    """
+    words = pkg_resources.resource_string('readembedability',
+                                          'data/stopwords.txt')
+    return frozenset(str(words, 'utf-8').strip().split("\n"))
+
+
+@lru_cache(maxsize=None)
+def load_punkt():
+    fname = pkg_resources.resource_filename('readembedability',
+                                            'data/english.pickle')
+    return nltk.load(fname)
+
+
+def load_models():
+    load_stopwords()
+    load_punkt()
+
+
+class WordPunctTokenizer:
     """
     Just like:
     http://www.nltk.org/api/nltk.tokenize.html#nltk.tokenize.regexp.WordPunctTokenizer
     except consider a '-' to join parts of a word (like 'Ben-Hur').
     """
-    def __init__(self):
-        RegexpTokenizer.__init__(self, r'\w+[-\w+]*|[^\w\s]+')
+    # the same flags nltk's RegexpTokenizer uses
+    PATTERN = re.compile(r'\w+[-\w+]*|[^\w\s]+',
+                         re.UNICODE | re.MULTILINE | re.DOTALL)
+
+    def tokenize(self, text):
+        return self.PATTERN.findall(text)
+
+
+TOKENIZER = WordPunctTokenizer()
 
 
 # pylint: disable=too-many-instance-attributes
@@ -39,23 +67,63 @@ class Summarizer:
         self.text = re.sub("[\n\ ]+", " ", re.sub("\n\s*\n+", ". ", text))
         self.lower_text = self.text.lower()
         self.title = title
+        # see common_cap
+        self.caps = {}
         self.summarize()
 
+    @classmethod
+    def for_result(cls, result):
+        """
+        Get the Summarizer for a ParseResult's _text and title.  It's
+        shared by all parsers in the parse until either changes.
+        """
+        text, title = result.get('_text'), result.get('title')
+        memo = result.memos.get('summarizer')
+        if memo is None or memo[0] != text or memo[1] != title:
+            memo = (text, title, cls(text, title))
+            result.memos['summarizer'] = memo
+        return memo[2]
+
+    def index_tokens(self):
+        """
+        Tokenize each sentence once, and index which sentences each token
+        shows up in.
+        """
+        self.token_sentences = defaultdict(list)
+        self.sentence_tokens = []
+        self.sentence_words = []
+        self.words = Counter()
+        for index, sentence in enumerate(self.raw_sentences):
+            tokens = TOKENIZER.tokenize(sentence.strip())
+            self.sentence_tokens.append(tokens)
+            words = Counter(Summarizer.terms(tokens))
+            self.sentence_words.append(words)
+            self.words.update(words)
+            for token in tokens:
+                sentences = self.token_sentences[token]
+                if not sentences or sentences[-1] != index:
+                    sentences.append(index)
+
     def common_cap(self, word):
         """
-        Get the most common capitalization of this word.
+        Get the most common capitalization of this word, counting every
+        place it shows up in the text (even inside other words, so the
+        "art" in "start" counts).  Remembered, since it's asked for the
+        same words over and over.
         """
         word = word.lower()
-        versions = []
-        lindex = self.lower_text.find(word)
-        while lindex > -1:
-            rindex = lindex + len(word)
-            versions.append(self.text[lindex:rindex])
-            lindex = self.lower_text.find(word, rindex)
-        # possible we've never seen it before
-        if not versions:
-            return word
-        return most_common(versions)[0]
+        cap = self.caps.get(word)
+        if cap is None:
+            versions = []
+            lindex = self.lower_text.find(word)
+            while lindex > -1:
+                rindex = lindex + len(word)
+                versions.append(self.text[lindex:rindex])
+                lindex = self.lower_text.find(word, rindex)
+            # possible we've never seen it before
+            cap = most_common(versions)[0] if versions else word
+            self.caps[word] = cap
+        return cap
 
     def get_entity_from_sentence(self, originalcase, words):
         """
@@ -79,13 +147,11 @@ class Summarizer:
         return entity
 
     def get_entity(self, originalcase):
-        tokenizer = WordPunctTokenizer()
-        for sentence in self.raw_sentences:
-            words = tokenizer.tokenize(sentence.strip())
-            if originalcase in words:
-                entity = self.get_entity_from_sentence(originalcase, words)
-                if len(entity) > 1:
-                    return " ".join(entity)
+        for index in self.token_sentences.get(originalcase, []):
+            words = self.sentence_tokens[index]
+            entity = self.get_entity_from_sentence(originalcase, words)
+            if len(entity) > 1:
+                return " ".join(entity)
         return originalcase
 
     def keywords(self, count=5):
@@ -105,12 +171,7 @@ class Summarizer:
         return results
 
     def slug(self, length=5):
-        slug = []
-        tokenizer = WordPunctTokenizer()
-        for word in tokenizer.tokenize(self.title or ""):
-            word = word.lower()
-            if len(word) > 2 and word not in STOPWORDS:
-                slug.append(word)
+        slug = list(Summarizer.terms(TOKENIZER.tokenize(self.title or "")))
         # make sure we get at least 5 words
         slug += self.keywords(length)
         return ("-".join(slug[:length]).lower()).replace(' ', '-')
@@ -120,7 +181,16 @@ class Summarizer:
         Stop adding sentences when either max_sentence_count is reached
         or the # of words is >= to sufficient_word_count.
         """
-        top = heapq.nlargest(max_sentence_count, self.sentences)
+        count = min(max_sentence_count, len(self.sentences))
+        top = []
+        if count > 0:
+            # everything scoring at least the count-th best score is a
+            # candidate, so that ties are broken just as with tuples
+            best = numpy.argpartition(-self.scores, count - 1)[:count]
+            lowest = self.scores[best].min()
+            candidates = numpy.flatnonzero(self.scores >= lowest).tolist()
+            top = [self.sentences[index] for index in candidates]
+            top = heapq.nlargest(count, top)
         sentences = [s[1] for s in sorted(top, key=itemgetter(2))]
         if not sentences:
             return ""
@@ -133,46 +203,72 @@ class Summarizer:
 
     def summarize(self):
         self.sentences = []
-        self.words = Summarizer.get_words(self.text)
+        self.scores = numpy.zeros(0, dtype=numpy.int64)
+        # pylint: disable=no-member
+        self.raw_sentences = load_punkt().tokenize(self.text)
+        # this sets self.words, too
+        self.index_tokens()
         self.title_words = set(Summarizer.get_words(self.title).keys())
         self.boosted = Counter()
         if not self.words:
             return
 
         # now boost words based on words in title
-        titular_boost = self.words.most_common(1)[0][1] / 2.0
-        for word, value in self.words.items():
-            self.boosted[word] = value
-            if word in self.title_words:
-                self.boosted[word] += titular_boost
-
-        # now get a score per sentence, based on location and # of keywords
-        freqwords = list(map(itemgetter(0), self.boosted.most_common(100)))
-        # pylint: disable=no-member
-        self.raw_sentences = PUNKT.tokenize(self.text)
-        for index, sentence in enumerate(self.raw_sentences):
-            sentence = sentence.strip()
-            words = Summarizer.get_words(sentence).keys()
-            score = len([word for word in words if word in freqwords])
+        terms = list(self.words)
+        columns = {term: column for column, term in enumerate(terms)}
+        weights = numpy.array([self.words[term] for term in terms],
+                              dtype=numpy.float64)
+        titular = [columns[word] for word in self.title_words
+                   if word in columns]
+        weights[titular] += weights.max() / 2.0
+        self.boosted = Counter(dict(zip(terms, weights.tolist())))
+
+        # a sparse sentence x term incidence matrix, as (row, column) pairs
+        rows = []
+        cols = []
+        for index, words in enumerate(self.sentence_words):
+            rows.extend([index] * len(words))
+            cols.extend(columns[word] for word in words)
+        rows = numpy.array(rows, dtype=numpy.int64)
+        cols = numpy.array(cols, dtype=numpy.int64)
+
+        # score each sentence by the number of top words it has (ties for
+        # the top words go to the word seen first), penalized by position
+        top = numpy.zeros(len(terms), dtype=numpy.int64)
+        order = numpy.argsort(-weights, kind='mergesort')
+        top[order[:SCORING_WORDS]] = 1
+        size = len(self.raw_sentences)
+        scores = numpy.bincount(rows, weights=top[cols], minlength=size)
+        lengths = numpy.bincount(rows, minlength=size)
+
+        # if there are at least 3 words in the sentence, and they're not
+        # just a repeat of the title, then keep it around
+        keep = numpy.flatnonzero((scores > 0) & (lengths > 3))
+        keep = [index for index in keep.tolist()
+                if set(self.sentence_words[index]) != self.title_words]
+        scores = scores.astype(numpy.int64) - numpy.arange(size)
+        self.scores = scores[keep]
+        self.sentences = []
+        for score, index in zip(self.scores.tolist(), keep):
+            sentence = self.raw_sentences[index].strip()
+            self.sentences.append((score, sentence, index))
 
-            # if there are at least 3 words in the sentence, and they're not
-            # just a repeat of the title, then keep it around
-            if score > 0 and set(words) != self.title_words and len(words) > 3:
-                # score is penalized by position
-                score -= index
-                heapq.heappush(self.sentences, (score, sentence, index))
+    @classmethod
+    def terms(cls, tokens):
+        """
+        The lower cased tokens that aren't stopwords or too short.
+        """
+        stopwords = load_stopwords()
+        for token in tokens:
+            word = token.lower()
+            if len(word) > 2 and word not in stopwords:
+                yield word
 
     @classmethod
     def get_words(cls, text):
-        tokenizer = WordPunctTokenizer()
-        words = Counter()
         if text is None:
-            return words
-        for word in tokenizer.tokenize(text):
-            word = word.lower()
-            if len(word) > 2 and word not in STOPWORDS:
-                words[word] += 1
-        return words
+            return Counter()
+        return Counter(cls.terms(TOKENIZER.tokenize(text)))
 
     @classmethod
     def is_word(cls, text):
@@ -187,8 +283,11 @@ class Summarizer:
         text = text.strip()
 
         # more than one word
-        if len(cls.get_words(text)) > 1:
-            return True
+        first = None
+        for word in cls.terms(TOKENIZER.tokenize(text)):
+            if first is not None and word != first:
+                return True
+            first = word
 
         # or one word that ends in a period
         if text and text[-1] in '?!:;.':
@@ -198,13 +297,16 @@ class Summarizer:
 
 
 class SummarizingParser(BaseParser):
+    READS = frozenset(['_text', 'title', 'keywords'])
+    WRITES = frozenset(['_text', 'wordcount', 'summary', 'keywords'])
+
     async def enrich(self, result):
         if '_text' not in result:
             if not self.soup:
                 return result
             result.set('_text', self.soup.all_text())
 
-        sumzer = Summarizer(result.get('_text'), result.get('title'))
+        sumzer = Summarizer.for_result(result)
         result.set('wordcount', len(sumzer.words))
         # only set props if there are at least 2 sentances
         if len(sumzer.sentences) > 2:
@@ -0,0 +1,315 @@
+import asyncio
+import functools
+import itertools
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+
+from readembedability import io, timing
+from readembedability.page import parse_page, warmup
+from readembedability.parsers.assets import ImagesParser
+
+# How often (in seconds) the pool checks that its workers are still alive
+CHECK_INTERVAL = 1.0
+
+
+def portable(error):
+    """
+    Return error if it can be unpickled in another process, otherwise
+    the nearest of its base classes that can be made from its message
+    (so an aiohttp error that can't be unpickled is still a ClientError).
+    """
+    for cls in type(error).__mro__:
+        try:
+            candidate = error if cls is type(error) else cls(str(error))
+            pickle.loads(pickle.dumps(candidate))
+            return candidate
+        # pylint: disable=broad-except
+        except Exception:
+            continue
+    return RuntimeError(str(error))
+
+
+def send(outq, kind, ident, error=None, value=None):
+    """
+    Put a message on a multiprocessing queue.  It's pickled here, rather
+    than in the queue's feeder thread (which only prints errors), so
+    anything that can't be pickled is sent as an error instead of lost.
+    """
+    error = None if error is None else portable(error)
+    try:
+        data = pickle.dumps((kind, ident, error, value))
+    # pylint: disable=broad-except
+    except Exception as err:
+        error = RuntimeError("Could not pickle %s: %r" % (kind, err))
+        data = pickle.dumps((kind, ident, error, None))
+    outq.put(data)
+
+
+class RemoteClient:
+    """
+    The HTTPClient (and image measurer) in worker processes, which has
+    the parent process do all of the network I/O.
+    """
+    def __init__(self, worker):
+        self.worker = worker
+
+    async def fetch(self, url, headers, timeout, maxsize):
+        return await self.worker.call('fetch', url, headers, timeout,
+                                      maxsize)
+
+    async def get_size(self, url):
+        return await self.worker.call('size', url)
+
+    async def close(self):
+        pass
+
+
+class Worker:
+    """
+    Runs in each worker process, parsing as many pages at once as it's
+    given on its own event loop.  When a parser needs the network, the
+    parent process is asked to do the fetching, and the worker gets on
+    with parsing other pages in the meantime.
+    """
+    def __init__(self, index, inbox, outbox):
+        self.index = index
+        self.inbox = inbox
+        self.outbox = outbox
+        self.loop = asyncio.new_event_loop()
+        self.calls = {}
+        self.ids = itertools.count()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        client = RemoteClient(self)
+        io.CLIENT = client
+        ImagesParser.FETCH_SIZE = client.get_size
+        # timing hooks are called by the parent process (see
+        # ParserPool.parse), but forked workers get copies of them
+        del timing.HOOKS[:]
+        warmup()
+        threading.Thread(target=self.read, daemon=True).start()
+        send(self.outbox, 'ready', self.index)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def read(self):
+        while True:
+            data = self.inbox.get()
+            self.loop.call_soon_threadsafe(self.receive, data)
+            if data is None:
+                return
+
+    def receive(self, data):
+        if data is None:
+            self.loop.stop()
+            return
+        kind, ident, error, value = pickle.loads(data)
+        if kind == 'parse':
+            coro = self.parse(ident, error, value)
+            asyncio.ensure_future(coro, loop=self.loop)
+        elif kind == 'reply':
+            future = self.calls.pop(ident, None)
+            if future is None or future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+    async def parse(self, job, error, value):
+        result = None
+        if error is None:
+            try:
+                result = await parse_page(*value)
+            # pylint: disable=broad-except
+            except Exception as err:
+                error = err
+        send(self.outbox, 'done', job, error, result)
+
+    def call(self, method, *args):
+        """
+        Have the parent process run method (see ParserPool._call) and
+        return a future for what it gives back.
+        """
+        ident = next(self.ids)
+        future = self.loop.create_future()
+        self.calls[ident] = future
+        future.add_done_callback(functools.partial(self.called, ident))
+        send(self.outbox, 'call', (self.index, ident), value=(method, args))
+        return future
+
+    def called(self, ident, future):
+        if future.cancelled():
+            # like when probing images stops early - no need to finish
+            self.calls.pop(ident, None)
+            send(self.outbox, 'cancel', (self.index, ident))
+
+
+def _work(index, inbox, outbox):
+    Worker(index, inbox, outbox).run()
+
+
+class ParserPool:
+    """
+    Runs the CPU heavy parsing of pages in a pool of worker processes, so
+    that a big page doesn't block the event loop the fetching happens on.
+
+    Workers never touch the network: the sub-fetches that parsers make
+    (AMP pages, oEmbeds and image sizes) are sent back and done on this
+    process's event loop, and each worker parses other pages while it
+    waits on them.  Only pages, ParseResults and sub-fetches cross
+    process boundaries.
+    """
+    def __init__(self, processes=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self._loop = None
+        self._ready = None
+        self._started = 0
+        self._procs = []
+        self._inboxes = []
+        self._outbox = None
+        self._reader = None
+        self._dead = set()
+        # parses in progress on each worker
+        self._loads = []
+        # job id => (worker index, future for the ParseResult)
+        self._jobs = {}
+        # (worker index, call id) => task doing a worker's sub-fetch
+        self._calls = {}
+        self._ids = itertools.count()
+
+    def _spawn(self):
+        if self._procs:
+            return
+        self._loop = asyncio.get_event_loop()
+        self._ready = self._loop.create_future()
+        self._outbox = multiprocessing.Queue()
+        for index in range(self.processes):
+            inbox = multiprocessing.Queue()
+            args = (index, inbox, self._outbox)
+            proc = multiprocessing.Process(target=_work, args=args,
+                                           daemon=True)
+            proc.start()
+            self._procs.append(proc)
+            self._inboxes.append(inbox)
+            self._loads.append(0)
+        # not until after forking, since forking with threads is unsafe
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    async def start(self):
+        """
+        Start the workers, and wait for them to load everything they need
+        before they get any real work.
+        """
+        self._spawn()
+        await self._ready
+
+    def _read(self):
+        checked = time.monotonic()
+        while True:
+            try:
+                data = self._outbox.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                data = False
+            if data is None:
+                return
+            if data:
+                message = pickle.loads(data)
+                self._loop.call_soon_threadsafe(self._receive, *message)
+            if time.monotonic() - checked >= CHECK_INTERVAL:
+                checked = time.monotonic()
+                self._loop.call_soon_threadsafe(self._check)
+
+    def _receive(self, kind, ident, error, value):
+        if kind == 'ready':
+            self._started += 1
+            if self._started == self.processes and not self._ready.done():
+                self._ready.set_result(True)
+        elif kind == 'done':
+            index, future = self._jobs.pop(ident, (None, None))
+            if future is None:
+                return
+            self._loads[index] -= 1
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+        elif kind == 'call':
+            coro = self._call(ident, *value)
+            self._calls[ident] = asyncio.ensure_future(coro)
+        elif kind == 'cancel':
+            task = self._calls.pop(ident, None)
+            if task is not None:
+                task.cancel()
+
+    async def _call(self, ident, method, args):
+        index, call = ident
+        value, error = None, None
+        try:
+            if method == 'fetch':
+                value = await io.CLIENT.fetch(*args)
+            else:
+                value = await ImagesParser.FETCH_SIZE(*args)
+        # pylint: disable=broad-except
+        except Exception as err:
+            error = err
+        finally:
+            self._calls.pop(ident, None)
+        send(self._inboxes[index], 'reply', call, error, value)
+
+    def _check(self):
+        for index, proc in enumerate(self._procs):
+            if index in self._dead or proc.is_alive():
+                continue
+            self._dead.add(index)
+            error = RuntimeError("ParserPool worker %i died" % index)
+            for job, (windex, future) in list(self._jobs.items()):
+                if windex == index:
+                    del self._jobs[job]
+                    if not future.done():
+                        future.set_exception(error)
+            if not self._ready.done():
+                self._ready.set_exception(error)
+
+    async def parse(self, page, result):
+        """
+        Run all of the PARSERS over a fetched page in the least busy
+        worker.
+        """
+        self._spawn()
+        alive = [i for i in range(self.processes) if i not in self._dead]
+        if not alive:
+            raise RuntimeError("Every ParserPool worker has died")
+        index = min(alive, key=lambda i: self._loads[i])
+        job = next(self._ids)
+        future = self._loop.create_future()
+        self._jobs[job] = (index, future)
+        self._loads[index] += 1
+        done = len(result.timings.records)
+        send(self._inboxes[index], 'parse', job, value=(page, result))
+        result = await future
+        result.timings.replay(result.timings.records[done:])
+        return result
+
+    def close(self):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for proc in self._procs:
+            proc.join()
+        if self._reader is not None:
+            self._outbox.put(None)
+            self._reader.join()
+        for _, future in self._jobs.values():
+            future.cancel()
+        for task in self._calls.values():
+            task.cancel()
+        self._procs, self._inboxes, self._loads = [], [], []
+        self._jobs, self._calls = {}, {}
+        self._reader = None
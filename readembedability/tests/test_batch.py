@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+from collections import Counter
+
+from readembedability.batch import Batch
+from readembedability.tests.utils import async_test
+
+
+class Items:
+    """
+    An async iterator over items that counts how many have been taken.
+    """
+    def __init__(self, items):
+        self.items = iter(items)
+        self.taken = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            item = next(self.items)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.taken += 1
+        return item
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.running = Counter()
+        self.most = Counter()
+
+    async def work(self, item):
+        host = item[0]
+        self.running[None] += 1
+        self.running[host] += 1
+        self.most[None] = max(self.most[None], self.running[None])
+        self.most[host] = max(self.most[host], self.running[host])
+        await asyncio.sleep(0.001 * int(item[1:]))
+        self.running[None] -= 1
+        self.running[host] -= 1
+        return item.upper()
+
+    @async_test
+    async def test_limits(self):
+        items = ["a%i" % (i % 3) for i in range(12)]
+        items += ["b%i" % (i % 3) for i in range(12)]
+        batch = Batch(self.work, items, limit=5, key=lambda i: i[0],
+                      limit_per_key=3)
+        results = []
+        async for item, result in batch:
+            self.assertEqual(result, item.upper())
+            results.append(item)
+        self.assertEqual(sorted(results), sorted(items))
+        self.assertEqual(self.most[None], 5)
+        self.assertEqual(self.most['a'], 3)
+        self.assertEqual(self.most['b'], 3)
+
+    @async_test
+    async def test_backpressure(self):
+        items = Items("c1" for _ in range(1000))
+        batch = Batch(self.work, items, limit=4, key=lambda i: i[0],
+                      limit_per_key=2)
+        await batch.__anext__()
+        # 2 running, and the rest of the room taken by deferred items
+        self.assertLessEqual(items.taken, 8)
+        await batch.close()
+        with self.assertRaises(StopAsyncIteration):
+            await batch.__anext__()
@@ -0,0 +1,119 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from readembedability.cache import MemoryCache, DiskCache, MISSING
+
+
+class MemoryCacheTest(unittest.TestCase):
+    def make_cache(self):
+        return MemoryCache(maxsize=2)
+
+    def test_get_set(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get('one'))
+        self.assertIs(cache.get('one', MISSING), MISSING)
+        cache.set('one', None)
+        self.assertIn('one', cache)
+        self.assertIsNone(cache.get('one', MISSING))
+        cache.set('two', (1, 2))
+        self.assertEqual(cache.get('two'), (1, 2))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        cache.delete('two')
+        self.assertNotIn('two', cache)
+
+    def test_ttl(self):
+        cache = self.make_cache()
+        with mock.patch('time.time', return_value=100):
+            cache.set('one', 1, ttl=10)
+            cache.set('two', 2)
+        with mock.patch('time.time', return_value=111):
+            self.assertNotIn('one', cache)
+            self.assertIn('two', cache)
+
+    def test_lru(self):
+        cache = self.make_cache()
+        cache.set('one', 1)
+        cache.set('two', 2)
+        cache.get('one')
+        cache.set('three', 3)
+        self.assertIn('one', cache)
+        self.assertNotIn('two', cache)
+        self.assertEqual(len(cache), 2)
+
+
+class DiskCacheTest(MemoryCacheTest):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def make_cache(self):
+        return DiskCache(self.path, maxsize=2)
+
+    def test_purge(self):
+        cache = DiskCache(self.path, maxsize=3)
+        with mock.patch('time.time', return_value=100):
+            cache.set('one', 1, ttl=10)
+            cache.set('two', 2, ttl=100)
+            cache.set('three', 3)
+        # once it's full, expired entries go before any that are in use
+        with mock.patch('time.time', return_value=111):
+            cache.set('four', 4)
+            self.assertEqual(len(cache), 3)
+            self.assertNotIn('one', cache)
+            self.assertIn('two', cache)
+        with mock.patch('time.time', return_value=201):
+            cache.purge()
+            self.assertEqual(len(cache), 2)
+
+    def test_uses_batched(self):
+        cache = self.make_cache()
+        cache.set('one', 1)
+        cache.set('two', 2)
+        changes = cache._db.total_changes
+        for _ in range(10):
+            cache.get('one')
+        # hits don't write anything
+        self.assertEqual(cache._db.total_changes, changes)
+        cache.close()
+
+        # but they're written out on close
+        cache = self.make_cache()
+        cache.set('three', 3)
+        self.assertIn('one', cache)
+        self.assertNotIn('two', cache)
+
+    def test_flush_uses(self):
+        cache = DiskCache(self.path, maxsize=10)
+        for key in range(3):
+            cache.set(key, key)
+        with mock.patch.object(DiskCache, 'FLUSH_USES', 3):
+            cache.get(0)
+            cache.get(1)
+            cache.get('missing')
+            self.assertEqual(len(cache._uses), 2)
+            cache.get(2)
+            self.assertEqual(cache._uses, {})
+
+    def test_old_database(self):
+        cache = DiskCache(self.path)
+        cache._db.execute("DROP TABLE cache")
+        cache._db.execute("CREATE TABLE cache "
+                          "(key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+        cache._db.execute("INSERT INTO cache VALUES ('old', ?, NULL)",
+                          (pickle.dumps(1),))
+        cache._db.commit()
+        cache = DiskCache(self.path, maxsize=1)
+        self.assertEqual(cache.get('old'), 1)
+        cache.set('new', 2)
+        self.assertEqual(len(cache), 1)
+        self.assertIn('new', cache)
+
+    def test_persists(self):
+        self.make_cache().set('one', {'a': [1]})
+        self.assertEqual(self.make_cache().get('one'), {'a': [1]})
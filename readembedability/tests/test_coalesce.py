@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+
+from readembedability.coalesce import SingleFlight
+from readembedability.utils import URL
+from readembedability.tests.utils import async_test
+
+
+class SingleFlightTest(unittest.TestCase):
+    @async_test
+    async def test_coalesce(self):
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        flights = SingleFlight()
+        runs = [flights.run('a', work, 1) for _ in range(5)]
+        runs.append(flights.run('b', work, 2))
+        results = await asyncio.gather(*runs)
+        self.assertEqual(results, [2, 2, 2, 2, 2, 4])
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual((flights.calls, flights.coalesced), (6, 4))
+        self.assertEqual(flights.in_flight, 0)
+
+        # once it's landed, the next call does the work again
+        self.assertEqual(await flights.run('a', work, 3), 6)
+        self.assertEqual(calls, [1, 2, 3])
+
+    @async_test
+    async def test_cancel_one_waiter(self):
+        async def work():
+            await asyncio.sleep(0.01)
+            return 'done'
+
+        flights = SingleFlight()
+        first = asyncio.ensure_future(flights.run('a', work))
+        second = asyncio.ensure_future(flights.run('a', work))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 'done')
+
+    @async_test
+    async def test_url_keys(self):
+        async def work(url):
+            await asyncio.sleep(0.01)
+            return url
+
+        # the keys bin/server uses
+        flights = SingleFlight()
+        urls = ["x.com/a?id=1&id=2", "x.com/a?id=2", "X.com/a?id=2#top"]
+        runs = [flights.run(URL(url).normalized, work, url) for url in urls]
+        results = await asyncio.gather(*runs)
+        self.assertEqual(results, urls[:2] + ["x.com/a?id=2"])
+        self.assertEqual(flights.coalesced, 1)
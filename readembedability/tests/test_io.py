@@ -0,0 +1,102 @@
+import asyncio
+import pickle
+import unittest
+from collections import Counter
+from unittest import mock
+
+from readembedability import io
+from readembedability.io import get_page, HTTPClient, HTTPResponse
+from readembedability.io import ResponseTooLargeError
+from readembedability.tests.utils import async_test, FakeClientResponse
+
+
+class FakeClient(HTTPClient):
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error
+        self.requests = []
+
+    async def fetch(self, url, headers, timeout, maxsize):
+        self.requests.append((url, headers))
+        if self.error is not None:
+            raise self.error
+        return url
+
+
+class GetPageTest(unittest.TestCase):
+    @async_test
+    async def test_injected_client(self):
+        client = FakeClient()
+        result = await get_page("example.com/a", client=client, mobile=True)
+        self.assertEqual(result, "http://example.com/a")
+        _, headers = client.requests[0]
+        self.assertTrue(headers['User-Agent'].endswith("(Mobile)"))
+
+    @async_test
+    async def test_errors(self):
+        outcomes = Counter()
+        with mock.patch.object(io, 'FETCH_OUTCOMES', outcomes):
+            client = FakeClient(asyncio.TimeoutError())
+            self.assertIsNone(await get_page("example.com", client=client))
+            await get_page("example.com", client=FakeClient())
+            with self.assertRaises(KeyError):
+                await get_page("example.com", client=FakeClient(KeyError()))
+        self.assertEqual(outcomes, {'timeout': 1, 'ok': 1, 'error': 1})
+
+    @async_test
+    async def test_session_reused(self):
+        client = HTTPClient()
+        session = client.session
+        self.assertIs(client.session, session)
+        await client.close()
+        self.assertTrue(session.closed)
+        self.assertIsNot(client.session, session)
+        await client.close()
+
+
+class HTTPResponseTest(unittest.TestCase):
+    @async_test
+    async def test_process(self):
+        body = ("<p>%s</p>" % ("é" * 3000000)).encode('utf-8')
+        response = HTTPResponse(FakeClientResponse(body), len(body))
+        await response.process()
+        self.assertEqual(response.body.encode('utf-8'), body)
+        # chunks grow, so this shouldn't take thousands of reads
+        self.assertLess(response.response.content.reads, 20)
+
+    @async_test
+    async def test_binary(self):
+        body = b"\x89PNG" * 1000
+        response = HTTPResponse(FakeClientResponse(body, "image/png"), 5000)
+        await response.process()
+        self.assertEqual(response.body, body)
+
+    @async_test
+    async def test_too_large(self):
+        response = HTTPResponse(FakeClientResponse(b"x" * 101), 100)
+        with self.assertRaises(ResponseTooLargeError):
+            await response.process()
+
+        response = HTTPResponse(FakeClientResponse(b"x" * 100), 100)
+        await response.process()
+        self.assertEqual(response.body, "x" * 100)
+
+    @async_test
+    async def test_content_length(self):
+        headers = {'Content-Length': '101'}
+        fake = FakeClientResponse(b"x", headers=headers)
+        response = HTTPResponse(fake, 100)
+        with self.assertRaises(ResponseTooLargeError):
+            await response.process()
+        self.assertEqual(fake.content.reads, 0)
+
+    @async_test
+    async def test_pickle(self):
+        fake = FakeClientResponse(b"<p>hi</p>", headers={'ETag': '"a"'})
+        response = HTTPResponse(fake, 100)
+        await response.process()
+        copied = pickle.loads(pickle.dumps(response))
+        self.assertIsNone(copied.response)
+        self.assertEqual(copied.body, response.body)
+        self.assertEqual(copied.headers, response.headers)
+        self.assertTrue(copied.is_html())
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+import unittest
+
+from readembedability.lazy import LazyModule
+
+HEAVY = ['nltk', 'newspaper', 'readability', 'tidylib', 'fastimage', 'numpy']
+
+
+class LazyModuleTest(unittest.TestCase):
+    def test_attributes(self):
+        module = LazyModule('json')
+        self.assertIn("not loaded", repr(module))
+        self.assertEqual(module.loads("[1]"), [1])
+        self.assertNotIn("not loaded", repr(module))
+
+    def test_import_is_light(self):
+        # nothing heavy should be imported until it's needed
+        script = ("import sys\nimport readembedability.page\n"
+                  "print(' '.join(m for m in %r if m in sys.modules))")
+        script %= HEAVY
+        output = subprocess.check_output([sys.executable, "-c", script])
+        self.assertEqual(output.decode().strip(), "")
@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+from collections import Counter
+from unittest import mock
+
+from readembedability import io, page, timing
+from readembedability.metrics import Registry, ExtractionMetrics
+from readembedability.metrics import LoopLagMonitor
+from readembedability.tests.utils import async_test
+
+
+class RegistryTest(unittest.TestCase):
+    def test_render(self):
+        registry = Registry()
+        counter = registry.counter("things_total", "Things", ['kind'])
+        counter.inc(kind='a')
+        counter.inc(2, kind='a"b')
+        hist = registry.histogram("took_seconds", "Took", buckets=(0.1, 1))
+        hist.observe(0.05)
+        hist.observe(0.5)
+        hist.observe(5)
+        expected = "\n".join([
+            "# HELP things_total Things",
+            "# TYPE things_total counter",
+            'things_total{kind="a"} 1',
+            'things_total{kind="a\\"b"} 2',
+            "# HELP took_seconds Took",
+            "# TYPE took_seconds histogram",
+            'took_seconds_bucket{le="0.1"} 1',
+            'took_seconds_bucket{le="1"} 2',
+            'took_seconds_bucket{le="+Inf"} 3',
+            "took_seconds_sum 5.55",
+            "took_seconds_count 3"]) + "\n"
+        self.assertEqual(registry.render(), expected)
+
+    def test_max_series(self):
+        registry = Registry()
+        counter = registry.counter("hosts_total", "Hosts", ['host'],
+                                   max_series=2)
+        for host in ['a', 'b', 'c', 'd', 'a']:
+            counter.inc(host=host)
+        self.assertEqual(counter.get(host='a'), 2)
+        self.assertEqual(counter.get(host='other'), 2)
+
+
+class ExtractionMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.metrics = ExtractionMetrics(self.registry)
+        self.addCleanup(self.metrics.close)
+
+    def test_timings(self):
+        timings = timing.Timings("http://slow.example.com/a")
+        timings.record('parser', 'SocialParser', 0.2, 0.1)
+        timings.record('fetch', 'page', 3.0, 0.01)
+        timings.record('sanitize', 'sanitize_html', 0.01, 0.01)
+        self.assertEqual(self.metrics.parser_seconds.get(
+            parser='SocialParser')[2], 1)
+        self.assertEqual(self.metrics.work_seconds.get(
+            kind='sanitize')[2], 1)
+        self.assertEqual(self.metrics.slow_fetches.get(
+            host='slow.example.com'), 1)
+
+    def test_collect(self):
+        outcomes = Counter({'ok': 3, 'timeout': 1})
+        extractions = Counter({'started': 5, 'finished': 3})
+        with mock.patch.object(io, 'FETCH_OUTCOMES', outcomes), \
+                mock.patch.object(page, 'EXTRACTIONS', extractions):
+            text = self.registry.render()
+        self.assertIn('readembedability_fetch_outcomes_total{outcome="ok"} 3',
+                      text)
+        self.assertIn("readembedability_extractions_in_flight 2", text)
+
+
+class LoopLagMonitorTest(unittest.TestCase):
+    @async_test
+    async def test_lag(self):
+        monitor = LoopLagMonitor(Registry(), interval=0.001)
+        monitor.start()
+        while not monitor.lags.series:
+            await asyncio.sleep(0.001)
+        await monitor.stop()
+        self.assertGreaterEqual(monitor.lag.get(), 0)
@@ -0,0 +1,187 @@
+import unittest
+from unittest import mock
+
+from readembedability import page
+from readembedability.cache import ResultCache
+from readembedability.parsers import oembed
+from readembedability.parsers.base import BaseParser
+from readembedability.tests.utils import FakeResponse, async_test
+from readembedability.utils import URL
+
+
+class TitleParser(BaseParser):
+    READS = frozenset()
+    WRITES = frozenset(['title'])
+
+    async def enrich(self, result):
+        return result.set('title', self.soup.title.string)
+
+
+class FakePage(FakeResponse):
+    def __init__(self, body, status=200, headers=None):
+        super().__init__(body, "http://example.com/")
+        self.status = status
+        self.headers = headers or {}
+
+
+class FakePool:
+    def __init__(self):
+        self.parsed = 0
+
+    async def parse(self, fetched, result):
+        self.parsed += 1
+        return await page.parse_page(fetched, result)
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.responses = []
+        patches = [
+            mock.patch.object(page, 'RESULT_CACHE', ResultCache()),
+            mock.patch.object(page, 'PARSERS', [TitleParser]),
+            mock.patch.object(page, 'get_page', self.get_page)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def get_page(self, url, headers=None):
+        self.requests.append((str(url), headers))
+        return self.responses.pop(0)
+
+    @async_test
+    async def test_revalidate(self):
+        html = "<html><head><title>One</title></head></html>"
+        self.responses.append(FakePage(html, headers={'etag': '"abc"'}))
+        self.responses.append(FakePage("", 304))
+        first = await page.get_readembedable("Example.com")
+        second = await page.get_readembedable("example.com/")
+        self.assertEqual(first['title'], "One")
+        self.assertEqual(second['url'], "http://example.com/")
+        del first['url'], second['url']
+        self.assertEqual(first, second)
+        self.assertEqual(self.requests[0][1], None)
+        self.assertEqual(self.requests[1][1], {'If-None-Match': '"abc"'})
+        self.assertEqual(page.RESULT_CACHE.revalidated, 1)
+
+    @async_test
+    async def test_log_not_cached(self):
+        html = "<html><head><title>One</title></head></html>"
+        self.responses.append(FakePage(html, headers={'etag': '"abc"'}))
+        _, result = await page.get_readembedable_result("example.com")
+        self.assertIn('title', result.log)
+        url = URL("example.com")
+        cached = page.RESULT_CACHE.lookup(url)['result']
+        self.assertEqual(dict(cached.log), {})
+        self.assertEqual(cached.timings.records, [])
+        self.assertEqual(cached.to_dict(), result.to_dict())
+        # the result that was returned still has them
+        self.assertIn('title', result.log)
+        self.assertNotEqual(result.timings.records, [])
+
+    @async_test
+    async def test_params_kept(self):
+        html = "<html><head><title>One</title></head></html>"
+        self.responses.append(FakePage(html, headers={'etag': '"abc"'}))
+        self.responses.append(FakePage(html))
+        await page.get_readembedable("example.com/a?id=1&id=2")
+        await page.get_readembedable("example.com/a?id=2")
+        # a different page, so no validators from the first one
+        self.assertEqual(self.requests[0][0], "http://example.com/a?id=1&id=2")
+        self.assertIsNone(self.requests[1][1])
+
+    @async_test
+    async def test_changed(self):
+        html = "<html><head><title>%s</title></head></html>"
+        headers = {'last-modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        self.responses.append(FakePage(html % "One", headers=headers))
+        self.responses.append(FakePage(html % "Two"))
+        self.responses.append(FakePage(html % "Three"))
+        await page.get_readembedable("example.com")
+        result = await page.get_readembedable("example.com")
+        self.assertEqual(result['title'], "Two")
+        self.assertIn('If-Modified-Since', self.requests[1][1])
+        # no validators on the last response, so nothing cached
+        await page.get_readembedable("example.com")
+        self.assertIsNone(self.requests[2][1])
+
+    @async_test
+    async def test_timings(self):
+        html = "<html><head><title>One</title></head></html>"
+        self.responses.append(FakePage(html))
+        _, result = await page.get_readembedable_result("example.com")
+        timed = [(kind, name) for kind, name, _, _ in result.timings.records]
+        expected = [('fetch', 'page'), ('parse', 'document'),
+                    ('parser', 'TitleParser')]
+        self.assertEqual(timed, expected)
+
+    @async_test
+    async def test_pool(self):
+        pool = FakePool()
+        html = "<html><head><title>One</title></head></html>"
+        self.responses.append(FakePage(html))
+        result = await page.get_readembedable("example.com", pool=pool)
+        self.assertEqual(result['title'], "One")
+        self.assertEqual(pool.parsed, 1)
+
+    @async_test
+    async def test_many(self):
+        html = "<html><head><title>%s</title></head></html>"
+        for title in ["One", "Two"]:
+            self.responses.append(FakePage(html % title))
+        self.responses.append(None)
+        urls = ["example.com/1", "example.com/2", "example.com/3"]
+        results = page.get_readembedable_many(urls, limit_per_host=1)
+        titles = {}
+        async for url, result in results:
+            titles[url] = result['title']
+        expected = {"example.com/1": "One", "example.com/2": "Two",
+                    "example.com/3": None}
+        self.assertEqual(titles, expected)
+
+
+class ProviderTest(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.embeds = []
+        patches = [
+            mock.patch.object(page, 'PARSERS', [TitleParser]),
+            mock.patch.object(page, 'get_page', self.get_page),
+            mock.patch.object(oembed, 'get_page', self.get_embed)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def get_page(self, url, headers=None):
+        self.requests.append(str(url))
+        html = "<html><head><title>Page</title></head></html>"
+        return FakePage(html)
+
+    async def get_embed(self, url):
+        self.requests.append(url)
+        return self.embeds.pop(0)
+
+    @async_test
+    async def test_page_not_fetched(self):
+        body = '{"type": "video", "title": "Video", "html": "<iframe>"}'
+        self.embeds.append(FakePage(body))
+        url = "https://vimeo.com/123"
+        fetched, result = await page.get_readembedable_result(url)
+        self.assertIsNone(fetched)
+        self.assertEqual(len(self.requests), 1)
+        self.assertTrue(self.requests[0].startswith("https://vimeo.com/api/"))
+        self.assertTrue(result.get('success'))
+        self.assertTrue(result.get('embed'))
+        self.assertEqual(result.get('title'), "Video")
+        self.assertEqual(result.get('content'), "<iframe>")
+        timed = [(kind, name) for kind, name, _, _ in result.timings.records]
+        self.assertEqual(timed, [('fetch', 'oembed')])
+
+    @async_test
+    async def test_provider_missing(self):
+        self.embeds.append(None)
+        result = await page.get_readembedable("https://vimeo.com/123")
+        self.assertEqual(self.requests[1], "https://vimeo.com/123")
+        self.assertEqual(result['title'], "Page")
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from readembedability import io
+from readembedability.io import HTTPResponse
+from readembedability.page import parse_page
+from readembedability.parsers.assets import ImagesParser
+from readembedability.parsers.result import ParseResult
+from readembedability.pool import ParserPool, portable
+from readembedability.tests.utils import async_test, FakeClientResponse
+
+URL = "http://example.com/2017/03/13/budget.html"
+AMP_URL = "http://example.com/2017/03/13/budget.amp.html"
+OEMBED_URL = "http://example.com/oembed?url=budget"
+PARAGRAPH = ("<p>The council voted on a new budget for the city schools and "
+             "the river bridge after months of debate, while residents "
+             "packed the hall to hear from %s about the plan.</p>")
+PAGE = """<html><head><title>Council passes budget</title>
+<meta property="og:title" content="Council passes budget">
+<meta property="og:image" content="/img/og.png">
+<meta name="author" content="Jane Smith">
+<meta property="article:published_time" content="2017-03-13T10:00:00Z">
+<link rel="amphtml" href="%s">
+<link rel="alternate" type="application/json+oembed" href="%s">
+</head><body><nav>%s</nav><article>
+<h1>Council passes budget</h1><img src="/img/1.png"><img src="/img/2.png">
+%s</article><footer><p>Advertisement</p></footer></body></html>
+""" % (AMP_URL, OEMBED_URL,
+       "".join("<a href='/section/%i'>Section</a>" % i for i in range(200)),
+       "".join(PARAGRAPH % i for i in range(50)))
+AMP_PAGE = """<html amp><head><title>Council passes budget</title></head>
+<body><article><amp-img src="/img/amp.png"></amp-img>%s</article></body>
+</html>""" % PARAGRAPH % "the mayor"
+OEMBED = '{"type": "rich", "html": "Embedded WordPress Post"}'
+SIZES = {"/img/og.png": (1200, 630), "/img/1.png": (800, 450),
+         "/img/2.png": (800, 420), "/img/amp.png": (900, 500)}
+RESPONSES = {URL: (PAGE, "text/html"), AMP_URL: (AMP_PAGE, "text/html"),
+             OEMBED_URL: (OEMBED, "application/json")}
+
+
+def make_result():
+    result = ParseResult(URL)
+    result.set('canonical_url', URL)
+    return result.set('success', True)
+
+
+class FakeClient:
+    def __init__(self):
+        self.fetched = []
+
+    async def fetch(self, url, headers, timeout, maxsize):
+        # pylint: disable=unused-argument
+        self.fetched.append(url)
+        body, content_type = RESPONSES[url]
+        response = FakeClientResponse(body.encode('utf-8'), content_type,
+                                      url=url)
+        result = HTTPResponse(response, maxsize)
+        await result.process()
+        return result
+
+
+class ParserPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.measured = []
+        patches = [
+            mock.patch.object(io, 'CLIENT', self.client),
+            mock.patch.object(ImagesParser, 'FETCH_SIZE', self.get_size),
+            mock.patch.object(ImagesParser, 'SIZE_CACHE', None)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def get_size(self, url):
+        self.measured.append(url)
+        return SIZES[url.replace("http://example.com", "")]
+
+    @async_test
+    async def test_full_page(self):
+        page = await self.client.fetch(URL, {}, 10, 5000000)
+        pool = ParserPool(1)
+        try:
+            await pool.start()
+            result = await pool.parse(page, make_result())
+        finally:
+            pool.close()
+
+        # the worker did no network I/O of its own
+        self.assertEqual(sorted(self.client.fetched),
+                         sorted([URL, AMP_URL, OEMBED_URL]))
+        self.assertIn("http://example.com/img/amp.png", self.measured)
+
+        measured, self.measured = self.measured, []
+        expected = await parse_page(page, make_result())
+        self.assertEqual(sorted(measured), sorted(self.measured))
+        self.assertEqual(result.to_dict(), expected.to_dict())
+        self.assertEqual(result.get('title'), "Council passes budget")
+        timed = set((kind, name) for kind, name, _, _ in
+                    result.timings.records)
+        self.assertIn(('fetch', 'amp'), timed)
+        self.assertIn(('parser', 'ImagesParser'), timed)
+
+    def test_portable(self):
+        class Unpicklable(ValueError):
+            def __init__(self, first, second):
+                super().__init__("%s %s" % (first, second))
+
+        error = portable(Unpicklable("no", "good"))
+        self.assertEqual(type(error), ValueError)
+        self.assertEqual(str(error), "no good")
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from readembedability import timing
+from readembedability.parsers.base import ParseContext
+from readembedability.parsers.content import amp
+from readembedability.parsers.result import ParseResult
+from readembedability.timing import Timings, profiling, profile_report
+from readembedability.tests.utils import async_test, FakeResponse
+
+
+class TimingsTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        timing.add_hook(self.hook)
+        self.addCleanup(timing.remove_hook, self.hook)
+
+    def hook(self, url, kind, name, wall, cpu):
+        self.calls.append((url, kind, name, wall >= 0, cpu >= 0))
+
+    @async_test
+    async def test_time(self):
+        timings = Timings("http://example.com/")
+        for _ in range(2):
+            with timings.time('fetch', 'amp'):
+                await asyncio.sleep(0.01)
+        with timings.time('parser', 'Noop'):
+            pass
+
+        totals = timings.totals()
+        self.assertEqual(list(totals.keys()),
+                         [('fetch', 'amp'), ('parser', 'Noop')])
+        count, wall, cpu = totals[('fetch', 'amp')]
+        self.assertEqual(count, 2)
+        self.assertGreaterEqual(wall, 0.02)
+        # sleeping doesn't take any cpu
+        self.assertLess(cpu, wall)
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.calls[0],
+                         ("http://example.com/", 'fetch', 'amp', True, True))
+        self.assertIn("Noop", str(timings))
+
+    def test_replay(self):
+        timings = Timings()
+        timings.replay([('parser', 'Elsewhere', 0.5, 0.25)])
+        self.assertEqual(timings.records, [])
+        self.assertEqual(self.calls,
+                         [(None, 'parser', 'Elsewhere', True, True)])
+
+    @async_test
+    async def test_amp(self):
+        page = FakeResponse("<html><head><link rel='amphtml' href='/amp'>"
+                            "</head><body></body></html>",
+                            "http://example.com/")
+        ampage = FakeResponse("<html><body><article><p>Some text.</p>"
+                              "</article></body></html>",
+                              "http://example.com/amp")
+
+        async def get_page(url, mobile):  # pylint: disable=unused-argument
+            return ampage
+
+        context = ParseContext(page)
+        with mock.patch.object(amp, 'get_page', get_page):
+            parser = amp.AMPParser(page, context)
+            result = await parser.enrich(ParseResult(page.url))
+        self.assertEqual(result.get('content'),
+                         "<article><p>Some text.</p></article>")
+        # the amp page's parse and sanitize are part of this request's
+        timed = [(kind, name) for kind, name, _, _ in context.timings.records]
+        expected = [('parse', 'document'), ('fetch', 'amp'),
+                    ('parse', 'document'), ('sanitize', 'sanitize_html')]
+        self.assertEqual(timed, expected)
+        self.assertEqual(context.sanitize.misses, 1)
+
+    def test_profiling(self):
+        with profiling() as profiler:
+            sorted(range(1000), key=str)
+        self.assertIn("sorted", profile_report(profiler, 5))
@@ -18,6 +18,30 @@ class UtilsTest(unittest.TestCase):
         url = URL(surl).set_param('one', 'two').set_param('three', 'four')
         self.assertEqual(surl + '&one=two&three=four', str(url))
 
+    def test_url_normalized(self):
+        url = URL("http://Example.COM:80?b=1&a=2#top")
+        self.assertEqual(url.normalized, "http://example.com/?b=1&a=2")
+        url = URL("https://example.com:8443/A")
+        self.assertEqual(url.normalized, "https://example.com:8443/A")
+
+    def test_url_normalized_params(self):
+        # repeated and blank params make for different pages
+        repeated = URL("http://x.com/a?id=1&id=2")
+        self.assertEqual(repeated.normalized, "http://x.com/a?id=1&id=2")
+        self.assertNotEqual(repeated.normalized,
+                            URL("http://x.com/a?id=2").normalized)
+        self.assertNotEqual(URL("http://x.com/a?flag").normalized,
+                            URL("http://x.com/a").normalized)
+        self.assertNotEqual(URL("http://x.com/a?b=1&a=2").normalized,
+                            URL("http://x.com/a?a=2&b=1").normalized)
+        # and they're fetched as given
+        self.assertEqual(str(repeated), "http://x.com/a?id=1&id=2")
+        self.assertEqual(str(URL("http://x.com/a?flag")),
+                         "http://x.com/a?flag")
+        self.assertEqual(repeated.get_param('id'), '2')
+        repeated.set_param('id', '3').set_param('x', '')
+        self.assertEqual(str(repeated), "http://x.com/a?id=3&x=")
+
     def test_flatten(self):
         def flat(maybelist):
             return list(flatten(maybelist))
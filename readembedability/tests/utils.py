@@ -5,7 +5,8 @@ from functools import wraps
 def async_test(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        loop = asyncio.get_event_loop()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         result = loop.run_until_complete(func(*args, **kwargs))
         loop.close()
         return result
@@ -23,3 +24,44 @@ class FakeResponse:
 
     def is_binary(self):
         return False
+
+
+class FakeStream:
+    """
+    Just enough of aiohttp's StreamReader to feed HTTPResponse.process.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+        self.reads = 0
+
+    async def read(self, size=-1):
+        self.reads += 1
+        end = len(self.data) if size < 0 else self.offset + size
+        chunk = self.data[self.offset:end]
+        self.offset += len(chunk)
+        return chunk
+
+    def at_eof(self):
+        return self.offset >= len(self.data)
+
+
+class FakeClientResponse:
+    """
+    Stand in for an aiohttp ClientResponse.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, body, content_type="text/html", headers=None,
+                 url="http://example.com/", status=200):
+        self.status = status
+        self.url = url
+        self.content = FakeStream(body)
+        headers = headers or {}
+        headers['Content-Type'] = content_type
+        self.raw_headers = [(k.encode(), v.encode()) for k, v in
+                            headers.items()]
+        self._content = None
+
+    # pylint: disable=no-self-use
+    def _get_encoding(self):
+        return 'utf-8'
@@ -0,0 +1,99 @@
+import cProfile
+import io
+import pstats
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Functions called with (url, kind, name, wall, cpu) for every timing
+# recorded for any extraction (see add_hook).
+HOOKS = []
+
+
+def add_hook(hook):
+    """
+    Call hook(url, kind, name, wall, cpu) every time something is timed.
+    Kinds are 'fetch' (the page, and sub-fetches like 'amp', 'oembed' and
+    'image'), 'parse' (building the document), 'parser' (each parser's
+    enrich) and 'sanitize'.  Times are in seconds.
+    """
+    HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    HOOKS.remove(hook)
+
+
+class Timings:
+    """
+    Wall and CPU times for the parts of a single extraction, in the order
+    they finished.  Parsers and fetches run concurrently, so CPU times
+    include anything else that ran on the event loop in the meantime.
+    """
+    def __init__(self, url=None):
+        self.url = None if url is None else str(url)
+        self.records = []
+
+    def record(self, kind, name, wall, cpu):
+        self.records.append((kind, name, wall, cpu))
+        self.replay([(kind, name, wall, cpu)])
+
+    def replay(self, records):
+        """
+        Call the HOOKS for records (that were timed somewhere else, like a
+        worker process) without adding them again.
+        """
+        for kind, name, wall, cpu in records:
+            for hook in HOOKS:
+                hook(self.url, kind, name, wall, cpu)
+
+    @contextmanager
+    def time(self, kind, name):
+        """
+        Time the body of a with block (which can await).
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - wall,
+                        time.process_time() - cpu)
+
+    def totals(self):
+        """
+        An OrderedDict of (kind, name) => (count, wall, cpu).
+        """
+        totals = OrderedDict()
+        for kind, name, wall, cpu in self.records:
+            count, twall, tcpu = totals.get((kind, name), (0, 0.0, 0.0))
+            totals[(kind, name)] = (count + 1, twall + wall, tcpu + cpu)
+        return totals
+
+    def __str__(self):
+        lines = ["%-10s %-24s %5s %10s %10s" % ("kind", "name", "count",
+                                               "wall (ms)", "cpu (ms)")]
+        for (kind, name), (count, wall, cpu) in self.totals().items():
+            lines.append("%-10s %-24s %5i %10.2f %10.2f" % (
+                kind, name, count, wall * 1000, cpu * 1000))
+        return "\n".join(lines)
+
+
+@contextmanager
+def profiling():
+    """
+    cProfile everything that runs during a with block (including other
+    tasks on the event loop).  Gives a cProfile.Profile.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def profile_report(profiler, limit=30, sort='cumulative'):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
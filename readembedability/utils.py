@@ -1,7 +1,7 @@
 from urllib.parse import urlparse, parse_qsl, urlunparse, urlencode
 import re
 import datetime
-from collections import Counter, OrderedDict
+from collections import Counter
 
 from dateutil.parser import parse as dateutil_parse
 
@@ -15,7 +15,8 @@ class URL:
         if not url.startswith('http'):
             url = 'http://' + url
         self._parts = list(urlparse(url))
-        self._query = OrderedDict(parse_qsl(self._parts[4]))
+        # every query param in order, including repeated and blank ones
+        self._params = parse_qsl(self._parts[4], keep_blank_values=True)
 
     @property
     def basename(self):
@@ -55,11 +56,43 @@ class URL:
 
         return None
 
+    @property
+    def normalized(self):
+        """
+        A string version of this URL suitable for use as a key: scheme
+        and host are lower cased, default ports and fragments dropped.
+        Every query param is kept, in order.
+        """
+        scheme = self._parts[0].lower()
+        host = self.host.lower()
+        default_port = {'http': ':80', 'https': ':443'}.get(scheme)
+        if default_port and host.endswith(default_port):
+            host = host[:-len(default_port)]
+        path = self.path or '/'
+        query = urlencode(self._params)
+        return urlunparse([scheme, host, path, self._parts[3], query, ''])
+
     def get_param(self, name, default=None):
-        return self._query.get(name, default)
+        values = [v for k, v in self._params if k == name]
+        return values[-1] if values else default
 
     def set_param(self, name, value):
-        self._query[name] = value
+        """
+        Replace any values of the name param with value (where the first
+        one was), or add it to the end.
+        """
+        params = []
+        added = False
+        for key, existing in self._params:
+            if key != name:
+                params.append((key, existing))
+            elif not added:
+                params.append((name, value))
+                added = True
+        if not added:
+            params.append((name, value))
+        self._params = params
+        self._parts[4] = urlencode(params)
         return self
 
     def set_params(self, **kwargs):
@@ -72,7 +105,6 @@ class URL:
         return str(self).lower().startswith(prefix.lower())
 
     def __str__(self):
-        self._parts[4] = urlencode(self._query)
         return urlunparse(self._parts)
 
     def __repr__(self):
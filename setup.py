@@ -21,9 +21,9 @@ setup(
        'beautifulsoup4==4.6.0',
        'nltk==3.2.4',
        'fastimage==2.0.0',
-       'pytidylib==0.3.2',
        'newspaper3k==0.2.2',
        'python-dateutil==2.6.1',
+       'numpy==1.13.1',
        'aiohttp==2.2.5'
     ]
 )